@@ -1,3 +1,6 @@
+import os
+from datetime import datetime
+
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
@@ -5,8 +8,14 @@ from sqlalchemy.orm import Session
 from db import Base, engine, get_db, SessionLocal
 from utils.qdrant_client_wrapper import setup_qdrant_collection
 from utils.cleanup import cleanup_expired_resumes
+from utils.schema_sync import add_missing_columns, add_missing_indexes
+from utils.partitions import create_partitioned_table, ensure_partitions
+from utils.model_loader import get_model
+from services.upload_backend.job_queue import claim_next_job
+from services.upload_backend.upload import run_claimed_job
+from config import settings
 from routes.auth import router as auth_router
-from routes import resumes
+from routes import resumes, jobs
 
 from apscheduler.schedulers.background import BackgroundScheduler
 import atexit
@@ -24,20 +33,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def run_scheduled_cleanup():
+    # The scheduler owns this session, so it must close it to return the connection to the pool
+    with SessionLocal() as db:
+        cleanup_expired_resumes(db)
+
+def reclaim_ingest_jobs():
+    """
+    With ingest_in_process there is no ingest_worker polling the queue, so the API claims
+    jobs itself: anything still queued, or left in processing by a restart once its
+    heartbeat goes stale. Claiming is SKIP LOCKED, so several API processes can run this.
+    """
+    worker_id = f"api:{os.getpid()}"
+    while True:
+        with SessionLocal() as db:
+            job = claim_next_job(db, worker_id)
+            claimed = (job.id, job.zip_path) if job else None
+        if not claimed:
+            return
+        logger.info(f"📥 API process {worker_id} claimed job {claimed[0]}.")
+        run_claimed_job(claimed[0], claimed[1], worker_id)
+
 # === Startup Event ===
 @app.on_event("startup")
 def startup_event():
+    if settings.storage_partitioned:
+        create_partitioned_table(engine)
+        ensure_partitions(engine)
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    add_missing_indexes(engine)
     setup_qdrant_collection()
     logger.info("PostgreSQL tables and Qdrant collection initialized.")
 
+    # The embedding model is loaded lazily on first use unless preloading is requested
+    if settings.embedding_preload and not settings.embedding_server_socket:
+        get_model()
+
     # Schedule background cleanup for expired temporary resumes
     scheduler = BackgroundScheduler()
     scheduler.add_job(
-        lambda: cleanup_expired_resumes(SessionLocal()),
+        run_scheduled_cleanup,
         trigger='interval',
         hours=24
     )
+    if settings.ingest_in_process:
+        scheduler.add_job(
+            reclaim_ingest_jobs,
+            trigger='interval',
+            seconds=settings.ingest_stale_seconds,
+            next_run_time=datetime.now(),
+        )
     scheduler.start()
 
     atexit.register(lambda: scheduler.shutdown(wait=False))
@@ -46,8 +92,8 @@ def startup_event():
 # === Manual Resume Cleanup Endpoint ===
 @app.delete("/temp-cleanup", tags=["Admin"])
 def delete_expired_temps(db: Session = Depends(get_db)):
-    cleanup_expired_resumes(db)
-    return {"message": "Expired temporary resumes deleted."}
+    report = cleanup_expired_resumes(db)
+    return {"message": "Expired temporary resumes deleted.", **report}
 
 # === Health Check ===
 @app.get("/")
@@ -57,3 +103,4 @@ def read_root():
 # === Routers ===
 app.include_router(auth_router, prefix="/auth")
 app.include_router(resumes.router)
+app.include_router(jobs.router)
@@ -0,0 +1,85 @@
+"""
+Auth load benchmark: requests/second and latency of /auth/login and /auth/me
+against a running API, with --concurrency clients hammering one endpoint each run.
+
+A throwaway user is signed up first (reused if it already exists). Compare a
+server started with AUTH_CACHE_TTL_SECONDS=0 (every /me decodes the JWT and reads
+`users`) against the default, and BCRYPT_WORKERS / BCRYPT_ROUNDS for login.
+
+    python -m benchmarks.bench_auth --url http://localhost:8000 --concurrency 32 --seconds 10
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+from benchmarks.bench_search_concurrency import percentile
+
+EMAIL = "bench-auth@example.com"
+PASSWORD = "bench-auth-password"
+
+
+async def ensure_user(client: httpx.AsyncClient) -> str:
+    await client.post("/auth/signup", json={"name": "Auth Bench", "email": EMAIL, "number": "0000000000", "password": PASSWORD})
+    response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["token"]
+
+
+async def hammer(client: httpx.AsyncClient, send, concurrency: int, seconds: float):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await send(client)
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def report(label, latencies, errors, elapsed):
+    if not latencies:
+        print(f"{label:<6} no successful requests ({errors} errors)")
+        return
+    print(
+        f"{label:<6} {len(latencies) / elapsed:8.1f} req/s  p50={statistics.median(latencies) * 1000:7.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:7.1f}ms  errors={errors}"
+    )
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        token = await ensure_user(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        print(f"{args.concurrency} clients x {args.seconds}s against {args.url}")
+
+        if not args.skip_login:
+            login = lambda c: c.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            report("login", *await hammer(client, login, args.concurrency, args.seconds))
+
+        me = lambda c: c.get("/auth/me", headers=headers)
+        report("me", *await hammer(client, me, args.concurrency, args.seconds))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--skip-login", action="store_true")
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
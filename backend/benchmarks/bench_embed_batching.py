@@ -0,0 +1,79 @@
+"""
+Throughput vs. latency of query embeddings with and without micro-batching.
+
+Runs the configured encoder (local model or embedding server, as utils.model_loader
+picks it) on the inference executor, once with one call per request and once through
+a MicroBatcher built like query_batcher. Every request embeds a different job
+description, as concurrent /search calls would.
+
+    python -m benchmarks.bench_embed_batching --searchers 1,8,32
+"""
+import time
+import asyncio
+import argparse
+import itertools
+import statistics
+
+from config import settings
+from utils.micro_batcher import MicroBatcher
+from utils.model_loader import encode, inference_executor
+from services.search_batch import QUERY_INSTRUCTION
+from benchmarks.bench_search_concurrency import percentile
+
+TEMPLATES = [
+    "Senior backend engineer with Python, FastAPI and PostgreSQL (opening #{n})",
+    "Data engineer building Spark and Kafka pipelines on AWS (opening #{n})",
+    "DevOps engineer with Kubernetes, Terraform and CI/CD experience (opening #{n})",
+    "Frontend developer with React and TypeScript (opening #{n})",
+]
+
+
+async def drive(searchers: int, requests_each: int, encode_one, counter):
+    latencies = []
+
+    async def searcher():
+        for _ in range(requests_each):
+            n = next(counter)
+            start = time.perf_counter()
+            await encode_one([[QUERY_INSTRUCTION, TEMPLATES[n % len(TEMPLATES)].format(n=n)]])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(searcher() for _ in range(searchers)))
+    return latencies, time.perf_counter() - start
+
+
+def report(label, latencies, elapsed):
+    print(f"  {label:<10} {len(latencies) / elapsed:8.1f} req/s   "
+          f"p50={statistics.median(latencies) * 1000:7.1f}ms p99={percentile(latencies, 99) * 1000:7.1f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--searchers", default="1,8,32")
+    ap.add_argument("--requests", type=int, default=20, help="requests per searcher")
+    ap.add_argument("--window-ms", type=float, default=settings.embed_batch_window_ms)
+    ap.add_argument("--max-batch", type=int, default=settings.embed_max_batch)
+    args = ap.parse_args()
+
+    counter = itertools.count()
+    encode([[QUERY_INSTRUCTION, "warm-up"]])  # load the model before timing anything
+
+    for searchers in (int(n) for n in args.searchers.split(",")):
+        print(f"{searchers} concurrent searchers")
+
+        async def unbatched(inputs):
+            return await asyncio.get_running_loop().run_in_executor(inference_executor, encode, inputs)
+
+        report("unbatched", *asyncio.run(drive(searchers, args.requests, unbatched, counter)))
+
+        batcher = MicroBatcher(
+            encode, inference_executor,
+            max_batch=args.max_batch, window_ms=args.window_ms, max_in_flight=settings.inference_workers,
+        )
+        report("batched", *asyncio.run(drive(searchers, args.requests, batcher.encode, counter)))
+        print(f"  avg batch size {batcher.stats()['avg_batch_size']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Text-extraction benchmark over a generated corpus of PDF and DOCX resumes.
+
+Builds a ZIP of synthetic resumes, then runs ExtractionPool for every
+backend / pool size combination and reports resumes per second.
+
+    python -m benchmarks.bench_extract --docs 200 --workers 1,2,4
+"""
+import os
+import time
+import random
+import zipfile
+import argparse
+import tempfile
+
+from services.upload_backend.extract import EXTRACT_BACKENDS, ExtractionPool
+
+SKILLS = ["Python", "Kubernetes", "PostgreSQL", "React", "AWS", "Terraform", "Go", "Spark", "Docker", "Java"]
+ROLES = ["Backend Engineer", "Data Engineer", "SRE", "Frontend Developer", "ML Engineer"]
+
+
+def resume_lines(i: int) -> list:
+    rng = random.Random(i)
+    lines = [f"Candidate {i}", f"candidate{i}@example.com", f"Location: City {i % 17}", ""]
+    for job in range(rng.randint(2, 5)):
+        lines.append(f"{rng.choice(ROLES)} at Company {rng.randint(1, 500)} ({rng.randint(1, 6)} years)")
+        lines.extend(f"- Built systems with {', '.join(rng.sample(SKILLS, 3))}" for _ in range(6))
+    return lines
+
+
+def write_pdf(path: str, lines: list):
+    import pymupdf
+
+    doc = pymupdf.open()
+    for start in range(0, len(lines), 45):
+        page = doc.new_page()
+        page.insert_text((50, 60), "\n".join(lines[start:start + 45]), fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def write_docx(path: str, lines: list):
+    import docx
+
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def build_corpus(directory: str, count: int) -> str:
+    zip_path = os.path.join(directory, "corpus.zip")
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for i in range(count):
+            ext = ".pdf" if i % 2 == 0 else ".docx"
+            path = os.path.join(directory, f"resume_{i}{ext}")
+            (write_pdf if ext == ".pdf" else write_docx)(path, resume_lines(i))
+            zf.write(path, os.path.basename(path))
+            os.unlink(path)
+    return zip_path
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=200)
+    ap.add_argument("--workers", default="1,2,4")
+    ap.add_argument("--backends", default=",".join(EXTRACT_BACKENDS))
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        zip_path = build_corpus(directory, args.docs)
+        with zipfile.ZipFile(zip_path) as zf:
+            members = zf.infolist()
+        print(f"corpus: {args.docs} resumes ({os.path.getsize(zip_path) / 1e6:.1f} MB zipped)")
+
+        for backend in args.backends.split(","):
+            for workers in (int(w) for w in args.workers.split(",")):
+                pool = ExtractionPool(backend=backend, workers=workers)
+                list(pool.iter_extracted(zip_path, members[:workers]))  # warm up the workers
+                start = time.perf_counter()
+                extracted = [text for _, text in pool.iter_extracted(zip_path, members) if text]
+                elapsed = time.perf_counter() - start
+                pool.shutdown()
+                print(f"{backend:<10} workers={workers:<3} {len(extracted) / elapsed:8.1f} resumes/sec "
+                      f"({len(extracted)}/{args.docs} ok, {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
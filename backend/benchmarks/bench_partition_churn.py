@@ -0,0 +1,142 @@
+"""
+Churn benchmark: row-by-row TTL expiry vs. dropping day partitions.
+
+Simulates --days of ingest into two scratch tables shaped like resumes_llm, one
+plain and one range-partitioned by day. After each simulated day, rows older than
+the TTL are expired: chunked DELETEs on the plain table (as cleanup.py does), DROP
+TABLE of the expired partition on the other. Reports cleanup time, live rows, dead
+tuples and on-disk size (heap + indexes) per day. Needs the Postgres from .env;
+the scratch tables are dropped at the end.
+
+    python -m benchmarks.bench_partition_churn --days 7 --rows-per-day 50000
+"""
+import time
+import argparse
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, text
+
+from config import settings
+
+PLAIN = "churn_plain"
+PARTITIONED = "churn_partitioned"
+COLUMNS = """
+    id SERIAL,
+    document_id VARCHAR NOT NULL,
+    name VARCHAR,
+    skills TEXT[],
+    prev_roles TEXT[],
+    created_at TIMESTAMP NOT NULL
+"""
+INSERT = """
+    INSERT INTO {table} (document_id, name, skills, prev_roles, created_at)
+    SELECT md5(random()::text || g), 'Candidate ' || g,
+           ARRAY['python', 'sql', 'docker', 'aws'], ARRAY['backend engineer'],
+           CAST(:day AS timestamp) + (g % 86400) * interval '1 second'
+    FROM generate_series(1, :rows) AS g
+"""
+
+
+def setup(conn, autovacuum: bool):
+    for table in (PLAIN, PARTITIONED):
+        conn.execute(text(f"DROP TABLE IF EXISTS {table} CASCADE"))
+    conn.execute(text(f"CREATE TABLE {PLAIN} ({COLUMNS}, PRIMARY KEY (id))"))
+    conn.execute(text(f"CREATE UNIQUE INDEX ON {PLAIN} (document_id)"))
+    conn.execute(text(f"CREATE INDEX ON {PLAIN} (created_at)"))
+    if not autovacuum:
+        conn.execute(text(f"ALTER TABLE {PLAIN} SET (autovacuum_enabled = false)"))
+    conn.execute(text(f"CREATE TABLE {PARTITIONED} ({COLUMNS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"))
+    conn.execute(text(f"CREATE INDEX ON {PARTITIONED} (document_id)"))
+    conn.execute(text(f"CREATE INDEX ON {PARTITIONED} (created_at)"))
+
+
+def add_partition(conn, day: date, autovacuum: bool):
+    conn.execute(text(
+        f"CREATE TABLE {PARTITIONED}_p{day:%Y%m%d} PARTITION OF {PARTITIONED} "
+        f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+    ))
+    if not autovacuum:
+        conn.execute(text(f"ALTER TABLE {PARTITIONED}_p{day:%Y%m%d} SET (autovacuum_enabled = false)"))
+
+
+def expire_plain(engine, cutoff: date, batch_size: int) -> float:
+    started = time.perf_counter()
+    while True:
+        with engine.begin() as conn:
+            deleted = conn.execute(text(
+                f"DELETE FROM {PLAIN} WHERE id IN ("
+                f"SELECT id FROM {PLAIN} WHERE created_at < :cutoff ORDER BY id LIMIT :n)"
+            ), {"cutoff": cutoff, "n": batch_size}).rowcount
+        if not deleted:
+            return time.perf_counter() - started
+
+
+def expire_partitions(engine, cutoff: date, days: list) -> float:
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for day in [d for d in days if d < cutoff]:
+            conn.execute(text(f"DROP TABLE {PARTITIONED}_p{day:%Y%m%d}"))
+            days.remove(day)
+    return time.perf_counter() - started
+
+
+def table_stats(conn, table: str, partitioned: bool) -> tuple:
+    if partitioned:
+        relations = conn.execute(text(
+            "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = CAST(:t AS regclass)"
+        ), {"t": table}).scalars().all()
+    else:
+        relations = [table]
+    size = sum(conn.execute(text("SELECT pg_total_relation_size(CAST(:r AS regclass))"), {"r": r}).scalar() for r in relations)
+    live = conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+    dead = sum(conn.execute(text(
+        "SELECT coalesce(n_dead_tup, 0) FROM pg_stat_user_tables WHERE relid = CAST(:r AS regclass)"
+    ), {"r": r}).scalar() or 0 for r in relations)
+    return live, dead, size / 1024 / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--rows-per-day", type=int, default=50000)
+    ap.add_argument("--ttl-days", type=int, default=1)
+    ap.add_argument("--batch-size", type=int, default=settings.cleanup_batch_size)
+    ap.add_argument("--no-autovacuum", action="store_true", help="disable autovacuum on the scratch tables")
+    args = ap.parse_args()
+    autovacuum = not args.no_autovacuum
+
+    engine = create_engine(settings.postgres_url)
+    with engine.begin() as conn:
+        setup(conn, autovacuum)
+
+    start_day = date(2024, 1, 1)
+    partition_days = []
+    print(f"{args.days} days x {args.rows_per_day} rows, TTL {args.ttl_days} day(s), autovacuum {'on' if autovacuum else 'off'}")
+    print(f"{'day':>4} | {'plain: live':>11} {'dead':>8} {'MB':>7} {'cleanup s':>9} | {'partitioned: live':>17} {'MB':>7} {'cleanup s':>9}")
+    try:
+        for offset in range(args.days):
+            day = start_day + timedelta(days=offset)
+            with engine.begin() as conn:
+                add_partition(conn, day, autovacuum)
+                partition_days.append(day)
+                for table in (PLAIN, PARTITIONED):
+                    conn.execute(text(INSERT.format(table=table)), {"day": day, "rows": args.rows_per_day})
+
+            cutoff = day + timedelta(days=1) - timedelta(days=args.ttl_days)
+            plain_seconds = expire_plain(engine, cutoff, args.batch_size)
+            partition_seconds = expire_partitions(engine, cutoff, partition_days)
+
+            with engine.begin() as conn:
+                conn.execute(text(f"ANALYZE {PLAIN}"))
+                plain_live, plain_dead, plain_mb = table_stats(conn, PLAIN, partitioned=False)
+                part_live, _, part_mb = table_stats(conn, PARTITIONED, partitioned=True)
+            print(f"{offset + 1:>4} | {plain_live:>11} {plain_dead:>8} {plain_mb:>7.1f} {plain_seconds:>9.3f} | "
+                  f"{part_live:>17} {part_mb:>7.1f} {partition_seconds:>9.3f}")
+    finally:
+        with engine.begin() as conn:
+            for table in (PLAIN, PARTITIONED):
+                conn.execute(text(f"DROP TABLE IF EXISTS {table} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
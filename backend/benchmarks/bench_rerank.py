@@ -0,0 +1,67 @@
+"""
+Offline benchmark for the rerank stage: sequential batches vs. concurrent fan-out.
+
+Uses the fake local LLM, so no API key or network is needed.
+Run from the backend directory:
+
+    python -m benchmarks.bench_rerank --candidates 50 --latency 1.0
+"""
+import json
+import time
+import asyncio
+import argparse
+
+from services.fake_llm import FakeRankingChain
+from services.rerank import chunk_candidates, rerank_batches
+
+
+def make_candidates(n: int) -> list:
+    return [
+        {"id": f"doc-{i}", "skills": ["python", "sql"], "roles": ["engineer"], "experience": i % 10}
+        for i in range(n)
+    ]
+
+
+def run_sequential(chain, job_description, candidates, batch_size):
+    ranked = []
+    for batch in chunk_candidates(candidates, batch_size):
+        ranked.extend(chain.invoke({
+            "job_description": job_description,
+            "candidates": json.dumps(batch),
+            "format_instructions": "",
+        }).results)
+    return ranked
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", type=int, default=50)
+    ap.add_argument("--batch-size", type=int, default=20)
+    ap.add_argument("--latency", type=float, default=1.0)
+    ap.add_argument("--concurrency", type=int, default=4)
+    args = ap.parse_args()
+
+    job_description = "Senior backend engineer with Python and PostgreSQL"
+    candidates = make_candidates(args.candidates)
+    chain = FakeRankingChain(latency=args.latency)
+
+    start = time.perf_counter()
+    sequential = run_sequential(chain, job_description, candidates, args.batch_size)
+    sequential_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = asyncio.run(rerank_batches(
+        chain, job_description, candidates, "",
+        batch_size=args.batch_size, concurrency=args.concurrency, timeout=args.latency * 5,
+    ))
+    concurrent_s = time.perf_counter() - start
+
+    assert sorted((c.id, c.score) for c in sequential) == sorted((c.id, c.score) for c in concurrent)
+    batches = len(chunk_candidates(candidates, args.batch_size))
+    print(f"candidates={args.candidates} batches={batches} latency={args.latency}s concurrency={args.concurrency}")
+    print(f"sequential: {sequential_s:.2f}s")
+    print(f"concurrent: {concurrent_s:.2f}s  (speedup x{sequential_s / concurrent_s:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Concurrency benchmark for /search: N simultaneous searches on one event loop.
+
+"before" is the original handler: encode, the Qdrant query and each LLM batch in turn
+run synchronously on the event loop. "after" drives the current search pipeline
+(run_search_pipeline_async): query embeddings through query_batcher on the inference
+executor, the async Qdrant query and the concurrent rerank stage. Both use the same
+encoder, an in-memory Qdrant collection seeded with --resumes synthetic resumes and
+the fake local LLM, so no Qdrant server, database or API key is needed. Reports
+p50/p99 for each when all searches arrive together, and the longest stall of the
+event loop during the burst (time other requests would wait).
+
+    python -m benchmarks.bench_search_concurrency --searches 16 --llm-latency 0.5
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from datetime import datetime
+
+SKILLS = ["Python", "Java", "Go", "SQL", "PostgreSQL", "Kubernetes", "Docker", "AWS", "React",
+          "TypeScript", "Spark", "Kafka", "Terraform", "Machine Learning", "FastAPI", "Django"]
+ROLES = ["Backend Engineer", "Data Engineer", "DevOps Engineer", "Frontend Engineer",
+         "ML Engineer", "Software Engineer", "Site Reliability Engineer"]
+LOCATIONS = ["Bangalore", "Hyderabad", "Pune", "Chennai", "Remote"]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def make_records(n: int, rng: random.Random) -> list:
+    now = datetime.utcnow()
+    return [
+        {
+            "id": i + 1,
+            "document_id": f"bench-{i}",
+            "name": f"Candidate {i}",
+            "email": f"candidate{i}@example.com",
+            "mobile_number": "+91 90000 00000",
+            "skills": rng.sample(SKILLS, 5),
+            "prev_roles": rng.sample(ROLES, 2),
+            "years_experience": float(rng.randint(0, 15)),
+            "location": rng.choice(LOCATIONS),
+            "created_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+def make_job_descriptions(n: int, rng: random.Random) -> list:
+    # Distinct texts, so every search misses the query-embedding cache and is encoded
+    return [
+        f"{rng.choice(ROLES)} with {rng.randint(1, 10)}+ years of {', '.join(rng.sample(SKILLS, 3))} "
+        f"(opening #{i})"
+        for i in range(n)
+    ]
+
+
+async def seed_collections(records: list):
+    """
+    In-memory Qdrant collections (a sync client for "before", an async one for "after")
+    holding the records, embedded as ingest embeds them.
+    """
+    from qdrant_client import QdrantClient, AsyncQdrantClient
+    from qdrant_client.models import VectorParams, Distance, PointStruct
+
+    from config import settings
+    from services.upload_backend.upload import embed_records
+    from utils.qdrant_client_wrapper import resume_payload
+
+    vectors_config = VectorParams(size=settings.embedding_dim, distance=Distance.COSINE)
+    points = [
+        PointStruct(id=i, vector=vector.tolist(), payload=resume_payload(record))
+        for i, (record, vector) in enumerate(zip(records, embed_records(records)))
+    ]
+    sync_client = QdrantClient(":memory:")
+    sync_client.create_collection(collection_name=settings.qdrant_collection, vectors_config=vectors_config)
+    sync_client.upsert(collection_name=settings.qdrant_collection, points=points)
+    async_client = AsyncQdrantClient(":memory:")
+    await async_client.create_collection(collection_name=settings.qdrant_collection, vectors_config=vectors_config)
+    await async_client.upsert(collection_name=settings.qdrant_collection, points=points)
+    return sync_client, async_client
+
+
+def search_blocking(job_description: str, top_k: int, client, chain, format_instructions: str) -> list:
+    """The original run_search_pipeline: every stage blocks the caller in turn."""
+    from config import settings
+    from services.rerank import chunk_candidates
+    from services.search_batch import QUERY_INSTRUCTION, rerank_candidate
+    from utils.model_loader import encode
+
+    query_vector = encode([[QUERY_INSTRUCTION, job_description]])[0].tolist()
+    points = client.query_points(
+        collection_name=settings.qdrant_collection,
+        query=query_vector,
+        score_threshold=0.55,
+        with_payload=True,
+        limit=50,
+    ).points
+    candidates = [rerank_candidate(p) for p in points if p.payload and p.payload.get("document_id")]
+
+    ranked = []
+    for batch in chunk_candidates(candidates, 20):
+        ranked.extend(chain.invoke({
+            "job_description": job_description,
+            "candidates": json.dumps(batch),
+            "format_instructions": format_instructions,
+        }).results)
+    return sorted(ranked, key=lambda x: x.score, reverse=True)[:top_k]
+
+
+async def run_burst(search, job_descriptions: list, tick: float = 0.005):
+    """Starts every search at once; returns their latencies and the longest loop stall."""
+    stall = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal stall
+        while not done.is_set():
+            expected = time.perf_counter() + tick
+            await asyncio.sleep(tick)
+            stall = max(stall, time.perf_counter() - expected)
+
+    # All requests arrive together, so latency is measured from the shared start time
+    start = time.perf_counter()
+
+    async def timed(jd):
+        await search(jd)
+        return time.perf_counter() - start
+
+    watcher = asyncio.create_task(ticker())
+    latencies = await asyncio.gather(*(timed(jd) for jd in job_descriptions))
+    done.set()
+    await watcher
+    return latencies, stall
+
+
+def report(label, latencies, stall):
+    print(
+        f"{label:<7} p50={statistics.median(latencies) * 1000:8.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:8.1f}ms max={max(latencies) * 1000:8.1f}ms  "
+        f"longest loop stall={stall * 1000:6.1f}ms"
+    )
+
+
+async def main_async(args):
+    from config import settings
+    from services import search_batch
+    from utils.model_loader import query_batcher
+
+    rng = random.Random(args.seed)
+    sync_client, search_batch.qdrant = await seed_collections(make_records(args.resumes, rng))
+    format_instructions = search_batch.parser.get_format_instructions()
+
+    async def before(jd):
+        # The old async handler called the synchronous pipeline directly
+        search_blocking(jd, args.top_k, sync_client, search_batch.chain, format_instructions)
+
+    async def after(jd):
+        await search_batch.run_search_pipeline_async(jd, args.top_k, rerank_mode="llm")
+
+    print(
+        f"{args.searches} searches over {args.resumes} resumes, fake LLM {settings.fake_llm_latency}s/call, "
+        f"{settings.inference_workers} inference worker(s)"
+    )
+    await after(make_job_descriptions(1, random.Random(-1))[0])  # warm up the encoder
+
+    report("before", *await run_burst(before, make_job_descriptions(args.searches, rng)))
+    batches_before = query_batcher.batches
+    report("after", *await run_burst(after, make_job_descriptions(args.searches, rng)))
+    print(f"after: query embeddings in {query_batcher.batches - batches_before} forward pass(es)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--searches", type=int, default=16)
+    ap.add_argument("--resumes", type=int, default=200)
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--llm-latency", type=float, default=0.5, help="fake LLM seconds per rerank call")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    # Settings are read on import: rerank with the local stub, never the Groq API
+    os.environ["RERANK_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.llm_latency)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+/search response assembly: profiles from Postgres vs. from the Qdrant payload.
+
+Drives the route's own load_profiles and ranked_profiles and serializes the result
+with the response model, for --top-k ranked results. "postgres" fetches every profile
+from resumes_llm; "payload" (profiles_in_payload) builds them from the payload and
+only confirms the rows still exist. Needs the Postgres from .env: --top-k scratch
+resumes are inserted first and deleted at the end.
+
+    python -m benchmarks.bench_search_profiles --top-k 10 --requests 300
+"""
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import delete
+
+from config import settings
+from db import SessionLocal, AsyncSessionLocal
+from models import Resume
+from routes.resumes import CandidateProfile, load_profiles, ranked_profiles
+from services.rerank import CandidateScore
+from utils.qdrant_client_wrapper import resume_payload
+from benchmarks.bench_search_concurrency import make_records
+
+MODES = {"postgres": False, "payload": True}
+
+
+def seed(n: int) -> List[dict]:
+    records = make_records(n, random.Random(7))
+    with SessionLocal() as db:
+        rows = []
+        for record in records:
+            record["document_id"] = f"bench-profiles-{record['document_id']}"
+            rows.append(Resume(**{k: v for k, v in record.items() if k != "id"}))
+        db.add_all(rows)
+        db.commit()
+        for record, row in zip(records, rows):
+            record["id"] = row.id
+    return records
+
+
+def remove(records: List[dict]):
+    with SessionLocal() as db:
+        db.execute(delete(Resume).where(Resume.document_id.in_([r["document_id"] for r in records])))
+        db.commit()
+
+
+async def assemble(scores: List[CandidateScore], payloads: dict, adapter: TypeAdapter) -> bytes:
+    """The tail of /search after reranking: profiles, ranking, response model."""
+    async with AsyncSessionLocal() as db:
+        profiles = await load_profiles(db, [s.id for s in scores], payloads)
+    return adapter.dump_json(adapter.validate_python(ranked_profiles(scores, profiles)))
+
+
+async def time_mode(records: List[dict], requests: int) -> List[float]:
+    payloads = {r["document_id"]: resume_payload(r) for r in records}
+    scores = [CandidateScore(id=r["document_id"], score=100 - i) for i, r in enumerate(records)]
+    adapter = TypeAdapter(List[CandidateProfile])
+
+    for _ in range(20):  # warm-up: pool connections, validators
+        await assemble(scores, payloads, adapter)
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        body = await assemble(scores, payloads, adapter)
+        latencies.append((time.perf_counter() - started) * 1000)
+    assert body.count(b'"document_id"') == len(records)
+    return latencies
+
+
+async def main_async(records: List[dict], requests: int):
+    baseline = None
+    for mode, in_payload in MODES.items():
+        # Read when payloads are built and when profiles are loaded
+        settings.profiles_in_payload = in_payload
+        latencies = await time_mode(records, requests)
+        p50 = statistics.median(latencies)
+        baseline = baseline or p50
+        print(f"  {mode:<10} p50={p50:6.2f}ms  mean={statistics.mean(latencies):6.2f}ms  saved={baseline - p50:5.2f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--requests", type=int, default=300)
+    args = ap.parse_args()
+
+    records = seed(args.top_k)
+    print(f"top_k={args.top_k}, {args.requests} requests")
+    try:
+        asyncio.run(main_async(records, args.requests))
+    finally:
+        remove(records)
+
+
+if __name__ == "__main__":
+    main()
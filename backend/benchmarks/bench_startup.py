@@ -0,0 +1,56 @@
+"""
+Cold-start and per-worker memory of the API process.
+
+Spawns a fresh interpreter per mode, imports the app and runs its startup hook
+(the same work uvicorn does before serving /auth/login), then reports the time
+taken and the child's peak RSS. Needs the usual .env plus reachable Postgres and Qdrant.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --socket /tmp/talentfinder-embed.sock
+
+Modes: eager (model preloaded at startup), lazy (model loaded on first embed), and
+server (embeddings go to embedding_server.py; requires --socket and a running server).
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+CHILD = r"""
+import json, time, resource, asyncio
+start = time.perf_counter()
+import app
+for handler in app.app.router.on_startup:
+    result = handler()
+    if asyncio.iscoroutine(result):
+        asyncio.run(result)
+ready = time.perf_counter() - start
+print(json.dumps({"ready_s": ready, "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def run_mode(name: str, env_overrides: dict) -> dict:
+    env = {**os.environ, **env_overrides}
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    print(f"{name:<6} ready in {result['ready_s']:6.2f}s   peak RSS {result['peak_rss_mb']:8.1f} MB")
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--socket", help="embedding_server.py socket, enables the 'server' mode")
+    args = ap.parse_args()
+
+    run_mode("eager", {"EMBEDDING_PRELOAD": "true", "EMBEDDING_SERVER_SOCKET": ""})
+    run_mode("lazy", {"EMBEDDING_PRELOAD": "false", "EMBEDDING_SERVER_SOCKET": ""})
+    if args.socket:
+        run_mode("server", {"EMBEDDING_PRELOAD": "false", "EMBEDDING_SERVER_SOCKET": args.socket})
+
+
+if __name__ == "__main__":
+    main()
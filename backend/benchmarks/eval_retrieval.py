@@ -0,0 +1,106 @@
+"""
+Offline evaluation of adaptive candidate-pool sizing vs. the fixed 50-candidate pool.
+
+Each synthetic query has candidates with a latent relevance. Vector similarity and
+the LLM score are both noisy views of it (the LLM less noisy), which is the setting
+the rerank stage exists for. Reports NDCG@k and recall@k against the true top k, and
+how many candidates each strategy sends to the LLM (a proxy for tokens and latency).
+
+    python -m benchmarks.eval_retrieval --top-k 3,10,25 --queries 500
+"""
+import math
+import random
+import argparse
+import statistics
+
+from config import settings
+from services.candidate_pool import pool_size, plan_candidates, vector_to_score
+
+
+def make_query(rng: random.Random, n: int, vector_noise: float, llm_noise: float):
+    candidates = []
+    for i in range(n):
+        relevance = rng.betavariate(1.2, 4.0)
+        similarity = 0.45 + 0.5 * relevance + rng.gauss(0, vector_noise)
+        llm_score = max(1, min(100, round(1 + 99 * (relevance + rng.gauss(0, llm_noise)))))
+        candidates.append({"id": i, "relevance": relevance, "similarity": similarity, "llm": llm_score})
+    return candidates
+
+
+def retrieve(candidates, threshold, limit):
+    hits = [c for c in candidates if c["similarity"] >= threshold]
+    hits.sort(key=lambda c: c["similarity"], reverse=True)
+    return hits[:limit]
+
+
+def fixed_pool(candidates, top_k, args):
+    hits = retrieve(candidates, args.threshold, 50)
+    ranked = sorted(hits, key=lambda c: c["llm"], reverse=True)
+    return [c["id"] for c in ranked[:top_k]], len(hits)
+
+
+def adaptive_pool(candidates, top_k, args):
+    hits = retrieve(candidates, args.threshold, pool_size(top_k, args.multiplier, args.pool_min, args.pool_max))
+    head, keep = plan_candidates(
+        [c["similarity"] for c in hits], top_k,
+        max_gap=args.dropoff_gap, margin=args.skip_margin, min_score=args.skip_min_score,
+    )
+    reranked = sorted(hits[head:keep], key=lambda c: c["llm"], reverse=True)
+    floor = reranked[0]["llm"] if reranked else 1
+    leaders = sorted(hits[:head], key=lambda c: max(floor, vector_to_score(c["similarity"], args.threshold)), reverse=True)
+    return [c["id"] for c in (leaders + reranked)[:top_k]], keep - head
+
+
+def ndcg(ranked_ids, candidates, k):
+    relevance = {c["id"]: c["relevance"] for c in candidates}
+    dcg = sum(relevance[doc_id] / math.log2(i + 2) for i, doc_id in enumerate(ranked_ids[:k]))
+    ideal = sorted(relevance.values(), reverse=True)[:k]
+    idcg = sum(r / math.log2(i + 2) for i, r in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def recall(ranked_ids, candidates, k):
+    truth = {c["id"] for c in sorted(candidates, key=lambda c: c["relevance"], reverse=True)[:k]}
+    return len(truth & set(ranked_ids[:k])) / k
+
+
+def evaluate(strategy, queries, top_k, args):
+    ndcgs, recalls, sent = [], [], []
+    for candidates in queries:
+        ranked_ids, llm_candidates = strategy(candidates, top_k, args)
+        ndcgs.append(ndcg(ranked_ids, candidates, top_k))
+        recalls.append(recall(ranked_ids, candidates, top_k))
+        sent.append(llm_candidates)
+    return statistics.mean(ndcgs), statistics.mean(recalls), statistics.mean(sent)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--top-k", default="3,10,25")
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--candidates", type=int, default=300, help="resumes per query before the threshold")
+    ap.add_argument("--vector-noise", type=float, default=0.04)
+    ap.add_argument("--llm-noise", type=float, default=0.03)
+    ap.add_argument("--seed", type=int, default=13)
+    ap.add_argument("--threshold", type=float, default=settings.search_score_threshold)
+    ap.add_argument("--multiplier", type=float, default=settings.search_pool_multiplier)
+    ap.add_argument("--pool-min", type=int, default=settings.search_pool_min)
+    ap.add_argument("--pool-max", type=int, default=settings.search_pool_max)
+    ap.add_argument("--dropoff-gap", type=float, default=settings.search_dropoff_gap)
+    ap.add_argument("--skip-margin", type=float, default=settings.rerank_skip_margin)
+    ap.add_argument("--skip-min-score", type=float, default=settings.rerank_skip_min_score)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    queries = [make_query(rng, args.candidates, args.vector_noise, args.llm_noise) for _ in range(args.queries)]
+
+    for top_k in (int(k) for k in args.top_k.split(",")):
+        print(f"top_k={top_k}")
+        for label, strategy in (("fixed-50", fixed_pool), ("adaptive", adaptive_pool)):
+            mean_ndcg, mean_recall, mean_sent = evaluate(strategy, queries, top_k, args)
+            print(f"  {label:<9} NDCG@{top_k}={mean_ndcg:.3f}  recall@{top_k}={mean_recall:.3f}  "
+                  f"LLM candidates/query={mean_sent:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
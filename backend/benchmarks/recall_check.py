@@ -0,0 +1,91 @@
+"""
+Recall and speed of the ONNX / int8 encoder backends against the fp32 torch model.
+
+Embeds the fixture corpus (resumes and job descriptions) with each backend, ranks
+resumes by cosine similarity for every JD, and reports recall@k of each backend's
+top k against the torch top k, plus encode throughput.
+
+    python -m utils.encoders export --output models/instructor-large-onnx
+    python -m benchmarks.recall_check --backends torch,onnx,onnx-int8 --k 10
+"""
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+
+from config import settings
+from utils.encoders import create_encoder
+from utils.model_loader import MODEL_NAME
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "recall_corpus.json")
+RESUME_INSTRUCTION = "Represent the resume for job relevance retrieval"
+QUERY_INSTRUCTION = "Represent the job description for matching resumes:"
+
+
+def resume_inputs(resumes: list[dict]) -> list[list]:
+    # Same text layout as upload.embed_records
+    return [
+        [RESUME_INSTRUCTION,
+         f"Skills: {', '.join(r['skills'])}\nExperience: {r['years_experience']} years\nRoles: {', '.join(r['prev_roles'])}"]
+        for r in resumes
+    ]
+
+
+def top_k(query_vectors: np.ndarray, doc_vectors: np.ndarray, k: int) -> np.ndarray:
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def run_backend(backend: str, docs: list, queries: list, batch_size: int, onnx_dir: str):
+    encoder = create_encoder(backend, MODEL_NAME, onnx_dir, threads=settings.encoder_threads)
+    encoder.encode(queries[:2], batch_size=batch_size)  # warm-up
+
+    start = time.perf_counter()
+    doc_vectors = np.asarray(encoder.encode(docs, batch_size=batch_size), dtype=np.float32)
+    elapsed = time.perf_counter() - start
+    query_vectors = np.asarray(encoder.encode(queries, batch_size=batch_size), dtype=np.float32)
+    return doc_vectors, query_vectors, len(docs) / elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", default="torch,onnx,onnx-int8")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--onnx-dir", default=settings.encoder_onnx_dir)
+    ap.add_argument("--min-recall", type=float, default=0.9, help="exit non-zero below this recall@k")
+    args = ap.parse_args()
+
+    with open(FIXTURE) as f:
+        corpus = json.load(f)
+    docs = resume_inputs(corpus["resumes"])
+    queries = [[QUERY_INSTRUCTION, jd] for jd in corpus["job_descriptions"]]
+    backends = [b.strip() for b in args.backends.split(",")]
+    if backends[0] != "torch":
+        backends.insert(0, "torch")
+
+    print(f"{len(docs)} resumes, {len(queries)} job descriptions, k={args.k}")
+    baseline = None
+    failed = False
+    for backend in backends:
+        doc_vectors, query_vectors, docs_per_s = run_backend(backend, docs, queries, args.batch_size, args.onnx_dir)
+        ranking = top_k(query_vectors, doc_vectors, args.k)
+        if baseline is None:
+            baseline = (doc_vectors, ranking, docs_per_s)
+            print(f"  {backend:<10} {docs_per_s:8.1f} docs/s   (baseline)")
+            continue
+
+        base_vectors, base_ranking, base_rate = baseline
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ranking, base_ranking)])
+        cosine = float(np.mean(np.sum(doc_vectors * base_vectors, axis=1)))
+        print(f"  {backend:<10} {docs_per_s:8.1f} docs/s   speedup={docs_per_s / base_rate:4.2f}x   "
+              f"recall@{args.k}={recall:.3f}   mean cos to fp32={cosine:.4f}")
+        failed |= recall < args.min_recall
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,10 +6,104 @@ class Settings(BaseSettings):
     postgres_url: str
     qdrant_host: str = "http://localhost:6333"
     qdrant_collection: str = "resume_vectors2"  
+    qdrant_jobs_collection: str = "job_vectors"  # job description embeddings (reverse search)
     embedding_dim: int = 1024
     api: str
     api2: str 
     api1: str
+    groq_api_keys: str = ""  # extra comma-separated keys for resume parsing
+
+    # Database connection pools (per process)
+    db_pool_size: int = 5                # sync engine: uploads, admin, ingest workers
+    db_max_overflow: int = 10
+    async_db_pool_size: int = 10         # async engine: auth, /search, /profile, progress streams
+    async_db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0        # seconds a checkout waits before failing
+    db_pool_recycle: int = 1800          # reconnect connections older than this (seconds); -1 = never
+    db_pool_pre_ping: bool = True        # test connections on checkout, dropping ones the server closed
+
+    # Auth
+    bcrypt_rounds: int = 12              # cost factor for new hashes; older hashes are upgraded on login
+    bcrypt_workers: int = 4              # threads hashing/checking passwords off the event loop
+    auth_cache_ttl_seconds: float = 60.0 # token -> user cache lifetime; 0 disables it
+    auth_cache_size: int = 10000
+
+    # Rerank stage
+    rerank_backend: str = "groq"  # "groq" or "fake" (local stub for offline benchmarks)
+    rerank_concurrency: int = 4
+    rerank_batch_timeout: float = 30.0
+    fake_llm_latency: float = 1.0
+    rerank_cache_ttl_hours: int = 24
+    rerank_batch_size: int = 20
+    rerank_batch_pairs: int = 60         # (JD, candidate) scores per combined /search/batch prompt
+    batch_search_max_jds: int = 20       # job descriptions accepted per /search/batch call
+    rerank_mode: str = "llm"             # default for /search: "llm", "cross-encoder" or "cascade"
+    cross_encoder_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    cross_encoder_batch_size: int = 32
+    cascade_llm_candidates: int = 10     # cascade: cross-encoder shortlist size scored by the LLM
+
+    # Candidate pool (see services/candidate_pool.py)
+    search_score_threshold: float = 0.55
+    search_pool_multiplier: float = 3.0  # vector hits retrieved per requested result
+    search_pool_min: int = 10
+    search_pool_max: int = 50
+    search_dropoff_gap: float = 0.08     # cut the pool at a similarity gap this wide; 0 = off
+    rerank_skip_margin: float = 0.05     # leaders this far ahead of the rest skip the LLM; 0 = off
+    rerank_skip_min_score: float = 0.80
+    profiles_in_payload: bool = False    # store display profiles in Qdrant and serve /search without Postgres
+
+    # Model inference
+    inference_workers: int = 1
+    embed_batch_window_ms: float = 5.0   # how long a query embedding waits for others to share its batch
+    embed_max_batch: int = 32
+    embedding_preload: bool = False              # load the model at API startup instead of on first use
+    embedding_server_socket: Optional[str] = None  # Unix socket of embedding_server.py; unset = in-process model
+    encoder_backend: str = "torch"       # "torch", "onnx" or "onnx-int8" (see utils/encoders.py)
+    encoder_onnx_dir: str = "models/instructor-large-onnx"
+    encoder_threads: int = 0             # ONNX Runtime intra-op threads; 0 = runtime default
+
+    # Ingest pipeline
+    ingest_batch_size: int = 32          # files per extract/parse/embed stage batch
+    ingest_embed_batch_size: int = 32    # texts per encode forward pass
+    qdrant_upsert_batch_size: int = 256
+    extract_backend: str = "langchain"   # "langchain" (PyPDF/docx2txt) or "pymupdf"
+    extract_workers: int = 0             # extraction processes; 0 = one per CPU core
+    extract_queue_size: int = 64         # extracted resumes buffered ahead of parsing
+
+    # Ingest worker queue
+    upload_dir: str = "uploads"          # must be shared storage when workers run on other nodes
+    ingest_in_process: bool = False      # run ingest as a BackgroundTask instead of via ingest_worker.py
+    ingest_poll_interval: float = 2.0
+    ingest_heartbeat_seconds: float = 15.0
+    ingest_stale_seconds: float = 120.0  # processing jobs without a heartbeat this long are reclaimed
+    ingest_max_attempts: int = 3
+
+    # Expiry cleanup
+    resume_ttl_hours: int = 24
+    cleanup_batch_size: int = 1000       # expired rows per keyset chunk / bulk Qdrant delete
+    cleanup_qdrant_mode: str = "ids"     # "ids" (bulk delete per chunk) or "filter" (ids plus a sweep on payload created_at)
+    storage_partitioned: bool = False    # day-partitioned resumes_llm; expiry drops partitions (utils/partitions.py)
+    partition_days_ahead: int = 3        # future day partitions kept ready for inserts
+
+    # Upload progress
+    progress_commit_every: int = 25      # files between progress writes
+    progress_commit_interval: float = 2.0
+    progress_stream_interval: float = 1.0
+
+    # Resume parsing scheduler (per API key)
+    parse_requests_per_minute: int = 30
+    parse_concurrency_per_key: int = 2
+    parse_max_attempts: int = 4         # 429s are retried without counting toward this
+    parse_rate_limit_budget: float = 300.0  # seconds one resume may wait on 429s before it is skipped
+
+    # Query embedding cache
+    query_cache_size: int = 512
+    query_cache_path: Optional[str] = None  # SQLite file for the on-disk tier; unset = memory only
+
+    @property
+    def parse_api_keys(self) -> List[str]:
+        extra = [k.strip() for k in self.groq_api_keys.split(",") if k.strip()]
+        return [self.api1, self.api2, *extra]
 
     class Config:
         env_file = ".env"
@@ -1,15 +1,53 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from config import settings
+from utils.db_metrics import PoolMetrics, instrumented_pool
 
-engine = create_engine(settings.postgres_url)
+# === Connection pools ===
+sync_pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+engine = create_engine(
+    settings.postgres_url,
+    poolclass=instrumented_pool(QueuePool, sync_pool_metrics),
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+)
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
 
+# Async engine for routes that must not block the event loop (same database, asyncpg driver)
+async_engine = create_async_engine(
+    make_url(settings.postgres_url).set(drivername="postgresql+asyncpg"),
+    poolclass=instrumented_pool(AsyncAdaptedQueuePool, async_pool_metrics),
+    pool_size=settings.async_db_pool_size,
+    max_overflow=settings.async_db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+
+def pool_status() -> dict:
+    return {
+        "sync": sync_pool_metrics.snapshot(engine.pool),
+        "async": async_pool_metrics.snapshot(async_engine.sync_engine.pool),
+    }
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,68 @@
+"""
+Shared embedding server. Loads INSTRUCTOR once and serves every API and ingest
+worker on the node over a Unix socket, so workers no longer each hold a copy of
+the model. Requests arriving within the batching window share one forward pass.
+
+    python embedding_server.py --socket /tmp/talentfinder-embed.sock
+
+Then set embedding_server_socket to the same path for the API and the workers.
+"""
+import os
+import json
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from config import settings
+from utils.logger import logger
+from utils.micro_batcher import MicroBatcher
+from utils.model_loader import get_model
+from utils.embedding_protocol import read_frame, write_frame, encode_vectors
+
+
+async def handle_connection(encoder: MicroBatcher, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            try:
+                request = json.loads(await read_frame(reader))
+            except asyncio.IncompleteReadError:
+                return
+            try:
+                header, body = encode_vectors(await encoder.encode(request["inputs"]))
+            except Exception as e:
+                header, body = json.dumps({"error": str(e)}).encode(), b""
+            write_frame(writer, header)
+            write_frame(writer, body)
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: str, max_batch: int, window_ms: float, encode_fn=None):
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    encoder = MicroBatcher(
+        encode_fn or get_model().encode,
+        ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed-server"),
+        max_batch=max_batch,
+        window_ms=window_ms,
+    )
+    server = await asyncio.start_unix_server(lambda r, w: handle_connection(encoder, r, w), path=socket_path)
+    os.chmod(socket_path, 0o660)
+    logger.info(f"✅ Embedding server listening on {socket_path}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Talent Finder shared embedding server")
+    ap.add_argument("--socket", default="/tmp/talentfinder-embed.sock")
+    ap.add_argument("--max-batch", type=int, default=settings.embed_max_batch)
+    ap.add_argument("--window-ms", type=float, default=settings.embed_batch_window_ms)
+    args = ap.parse_args()
+    asyncio.run(serve(args.socket, args.max_batch, args.window_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Standalone ingest worker. Claims queued UploadJobs from Postgres and processes them
+outside the API process. Run as many as needed, on any node that can reach the
+database and the shared upload_dir:
+
+    python ingest_worker.py               # one worker process
+    python ingest_worker.py --processes 4 # four worker processes on this node
+"""
+import os
+import time
+import signal
+import socket
+import argparse
+import multiprocessing
+
+from config import settings
+from db import Base, engine, SessionLocal
+from utils.logger import logger
+from utils.schema_sync import add_missing_columns, add_missing_indexes
+from utils.partitions import create_partitioned_table, ensure_partitions
+
+_stopping = False
+
+
+def _request_stop(signum, frame):
+    global _stopping
+    _stopping = True
+    logger.info("🛑 Stop requested; finishing the current job first.")
+
+
+def run_worker():
+    # Imported here so each spawned process loads the model and clients itself
+    from services.upload_backend.job_queue import claim_next_job
+    from services.upload_backend.upload import run_claimed_job
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"👷 Ingest worker {worker_id} started.")
+
+    while not _stopping:
+        with SessionLocal() as db:
+            job = claim_next_job(db, worker_id)
+            claimed = (job.id, job.zip_path) if job else None
+
+        if not claimed:
+            time.sleep(settings.ingest_poll_interval)
+            continue
+
+        job_id, zip_path = claimed
+        logger.info(f"📥 Worker {worker_id} claimed job {job_id}.")
+        run_claimed_job(job_id, zip_path, worker_id)
+
+    logger.info(f"👋 Ingest worker {worker_id} stopped.")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Talent Finder ingest worker")
+    ap.add_argument("--processes", type=int, default=1)
+    args = ap.parse_args()
+
+    if settings.storage_partitioned:
+        create_partitioned_table(engine)
+        ensure_partitions(engine)
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    add_missing_indexes(engine)
+
+    if args.processes <= 1:
+        run_worker()
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=run_worker, name=f"ingest-{i}") for i in range(args.processes)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Text, Float, ARRAY, DateTime
+from sqlalchemy import Column, Integer, String, Text, Float, ARRAY, DateTime, JSON, Boolean
 from db import Base
 
 class User(Base):
@@ -26,12 +26,46 @@ class Resume(Base):
     skills = Column(ARRAY(Text))
     prev_roles = Column(ARRAY(Text))
     location = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class RerankScore(Base):
+    __tablename__ = "rerank_scores"
+
+    jd_hash = Column(String, primary_key=True)
+    document_id = Column(String, primary_key=True, index=True)
+    score = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class JobDescription(Base):
+    __tablename__ = "job_descriptions"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))  # also the Qdrant point id
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=False)
+    location = Column(Text)
+    is_open = Column(Boolean, default=True, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class UploadJob(Base):
     __tablename__ = "upload_jobs"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    zip_path = Column(String)
     total_files = Column(Integer)
+    extracted_files = Column(Integer, default=0)
     processed_files = Column(Integer, default=0)
-    status = Column(String, default="processing")
+    skipped_duplicates = Column(Integer, default=0)
+    last_file_index = Column(Integer, default=0)  # members before this index are finished
+    status = Column(String, default="queued", index=True)
+    stage = Column(String)  # extract / dedup / parse / embed / store / done
+    stage_timings = Column(JSON)  # seconds spent per stage
+    worker_id = Column(String)
+    heartbeat_at = Column(DateTime)
+    attempts = Column(Integer, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    throughput = Column(Float)  # stored resumes per second
@@ -1,24 +1,30 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-import bcrypt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # --- Import your project's modules ---
-from db import get_db
+from db import get_async_db
 from models import User
 from schemas import LoginRequest, SignUpRequest, UserOut # Assuming UserOut exists in schemas
 from utils.jwt import create_access_token, verify_token
+from utils.security import hash_password_async, verify_password_async, needs_rehash, user_cache
 
 router = APIRouter()
 
 # This scheme tells FastAPI how to find the token (in the "Authorization" header)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> UserOut:
     """
-    Decodes the JWT token, verifies it, and returns the corresponding User from the database.
+    Decodes the JWT token, verifies it, and returns the corresponding user profile.
+    Recently seen tokens are answered from the in-process cache without either step.
     This function is a reusable dependency for protected routes.
     """
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -29,52 +35,61 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise credentials_exception
     
     email: str = payload.get("email")
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    row = (await db.execute(
+        select(User.id, User.name, User.email, User.number).where(User.email == email)
+    )).mappings().first()
+    if row is None:
         raise credentials_exception
+    user = UserOut(**row)
+    user_cache.put(token, user, token_exp=payload.get("exp"))
     return user
 
 
 # --- API Routes ---
 
 @router.post("/signup")
-def signup(state: SignUpRequest, db: Session = Depends(get_db)):
+async def signup(state: SignUpRequest, db: AsyncSession = Depends(get_async_db)):
     # Check if email already exists
-    if db.query(User).filter(User.email == state.email).first(): #
-        raise HTTPException(status_code=400, detail="Email already registered") #
+    if (await db.execute(select(User.id).where(User.email == state.email))).first():
+        raise HTTPException(status_code=400, detail="Email already registered")
 
-    # Hash password and create user
-    hashed_pw = bcrypt.hashpw(state.password.encode(), bcrypt.gensalt()).decode() #
+    # Hash password (on the bcrypt pool) and create user
+    hashed_pw = await hash_password_async(state.password)
     new_user = User(
-        name=state.name, #
-        email=state.email, #
-        number=state.number, #
-        password=hashed_pw #
+        name=state.name,
+        email=state.email,
+        number=state.number,
+        password=hashed_pw
     )
 
-    db.add(new_user) #
-    db.commit() #
+    db.add(new_user)
+    await db.commit()
 
-    token = create_access_token({"email": state.email}) #
-    return {"message": "Signup successful", "token": token} #
+    token = create_access_token({"email": state.email})
+    return {"message": "Signup successful", "token": token}
 
 
 @router.post("/login")
-def login(state: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == state.email).first() #
+async def login(state: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(User).where(User.email == state.email))).scalars().first()
 
     # Check if user exists and password is correct
-    if not user or not bcrypt.checkpw(state.password.encode(), user.password.encode()): #
-        raise HTTPException(status_code=401, detail="Invalid email or password") #
+    if not user or not await verify_password_async(state.password, user.password):
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+
+    # Hashes made under an older bcrypt_rounds are upgraded while the password is at hand
+    if needs_rehash(user.password):
+        user.password = await hash_password_async(state.password)
+        await db.commit()
 
-    token = create_access_token({"email": state.email}) #
-    return {"message": "Login successful", "token": token} #
+    token = create_access_token({"email": state.email})
+    return {"message": "Login successful", "token": token}
 
 
 @router.get("/me", response_model=UserOut)
-def get_user_profile(current_user: User = Depends(get_current_user)):
+async def get_user_profile(current_user: UserOut = Depends(get_current_user)):
     """
     A protected route that returns the current user's profile.
     The `get_current_user` dependency handles all the token validation.
     """
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,148 @@
+import time
+import uuid
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import PointStruct, PointIdsList, Filter, FieldCondition, MatchValue, LookupLocation
+
+from db import get_async_db
+from models import JobDescription
+from schemas import JobCreate, JobUpdate, JobOut, MatchingJob
+from services.search_batch import get_query_vector
+from services.candidate_pool import vector_to_score
+from config import settings
+from utils.qdrant_client_wrapper import async_qdrant_client
+from utils.logger import logger
+
+router = APIRouter()
+
+OPEN_JOBS = Filter(must=[FieldCondition(key="is_open", match=MatchValue(value=True))])
+
+def job_payload(job: JobDescription) -> dict:
+    return {"job_id": job.id, "title": job.title, "location": job.location, "is_open": job.is_open}
+
+async def get_job_or_404(db: AsyncSession, job_id: str) -> JobDescription:
+    job = await db.get(JobDescription, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+async def upsert_job_vector(job: JobDescription):
+    """
+    Embeds the JD once, with the same instruction /search uses for job descriptions,
+    so a resume scores the same against it in both directions.
+    """
+    vector = await get_query_vector(job.description)
+    await async_qdrant_client.upsert(
+        collection_name=settings.qdrant_jobs_collection,
+        points=[PointStruct(id=job.id, vector=vector, payload=job_payload(job))],
+        wait=True,
+    )
+
+# === Job Descriptions ===
+@router.post("/jobs", response_model=JobOut, tags=["Jobs"])
+async def create_job(request: JobCreate, db: AsyncSession = Depends(get_async_db)):
+    job = JobDescription(**request.model_dump())
+    db.add(job)
+    await db.flush()  # assigns the id; the row is only committed once the vector is stored
+    try:
+        await upsert_job_vector(job)
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"❌ Failed to index job description: {e}")
+        raise HTTPException(status_code=500, detail="Failed to index job description")
+    await db.commit()
+    return job
+
+@router.get("/jobs", response_model=List[JobOut], tags=["Jobs"])
+async def list_jobs(include_closed: bool = False, db: AsyncSession = Depends(get_async_db)):
+    stmt = select(JobDescription).order_by(JobDescription.created_at.desc())
+    if not include_closed:
+        stmt = stmt.where(JobDescription.is_open.is_(True))
+    return (await db.execute(stmt)).scalars().all()
+
+@router.get("/jobs/{job_id}", response_model=JobOut, tags=["Jobs"])
+async def get_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    return await get_job_or_404(db, job_id)
+
+@router.patch("/jobs/{job_id}", response_model=JobOut, tags=["Jobs"])
+async def update_job(job_id: str, request: JobUpdate, db: AsyncSession = Depends(get_async_db)):
+    job = await get_job_or_404(db, job_id)
+    changes = request.model_dump(exclude_unset=True)
+    reembed = "description" in changes and changes["description"] != job.description
+    for field, value in changes.items():
+        setattr(job, field, value)
+    await db.flush()
+    try:
+        if reembed:
+            await upsert_job_vector(job)
+        else:
+            # Title, location and open/closed only touch the payload
+            await async_qdrant_client.set_payload(
+                collection_name=settings.qdrant_jobs_collection,
+                payload=job_payload(job),
+                points=[job.id],
+                wait=True,
+            )
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"❌ Failed to update indexed job description {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update job description")
+    await db.commit()
+    return job
+
+@router.delete("/jobs/{job_id}", tags=["Jobs"])
+async def delete_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    job = await get_job_or_404(db, job_id)
+    await async_qdrant_client.delete(
+        collection_name=settings.qdrant_jobs_collection,
+        points_selector=PointIdsList(points=[job.id]),
+        wait=True,
+    )
+    await db.delete(job)
+    await db.commit()
+    return {"message": "Job deleted", "id": job_id}
+
+# === Reverse Search ===
+@router.get("/profile/{document_id}/matching-jobs", response_model=List[MatchingJob])
+async def matching_jobs(document_id: str, response: Response, top_k: int = Query(10, ge=1, le=100)):
+    """
+    Ranks open job descriptions for a stored resume. The resume's vector is read from
+    the resume collection inside Qdrant (lookup_from), so nothing is re-encoded and
+    the whole lookup is one vector search over the jobs.
+    """
+    try:
+        uuid.UUID(document_id)  # resume point ids are UUIDs
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    started = time.perf_counter()
+    try:
+        result = await async_qdrant_client.query_points(
+            collection_name=settings.qdrant_jobs_collection,
+            query=document_id,
+            lookup_from=LookupLocation(collection=settings.qdrant_collection),
+            query_filter=OPEN_JOBS,
+            with_payload=True,
+            limit=top_k,
+        )
+    except UnexpectedResponse as e:
+        if e.status_code == 404:  # no vector stored for this resume
+            raise HTTPException(status_code=404, detail="Profile not found")
+        raise
+    elapsed = (time.perf_counter() - started) * 1000
+
+    content = [
+        {
+            "id": p.payload["job_id"],
+            "title": p.payload.get("title"),
+            "location": p.payload.get("location"),
+            "score": vector_to_score(p.score),
+        }
+        for p in result.points
+    ]
+    response.headers["Server-Timing"] = f"retrieve;dur={elapsed:.1f}"
+    return content
@@ -1,98 +1,316 @@
 import os
+import json
+import time
+import shutil
+import asyncio
 import traceback
-import tempfile
 import uuid
-from typing import List
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, BackgroundTasks, Query
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, BackgroundTasks, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from sqlalchemy.inspection import inspect
-from pydantic import BaseModel
-
-from db import get_db
-from models import Resume, UploadJob
-from schemas import ResumeOut
-from services.upload_backend.upload import process_zip_file_for_api
-from services.search_batch import run_search_pipeline
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
+
+from db import get_db, get_async_db, AsyncSessionLocal, pool_status
+from models import Resume, UploadJob, RerankScore
+from schemas import ResumeOut, SearchFilters, clean_email
+from services.upload_backend.upload import run_claimed_job
+from services.search_batch import run_search_pipeline_async, run_batch_search_pipeline, iter_search_pipeline, query_cache
+from services.rerank import CandidateScore
 from config import settings
-from utils.qdrant_client_wrapper import qdrant_client
+from utils.qdrant_client_wrapper import qdrant_client, setup_qdrant_collection, profile_from_payload
 from qdrant_client.models import VectorParams, Distance
 from utils.logger import logger
+from utils.security import user_cache
 
 qdrant = qdrant_client
 
 router = APIRouter()
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
 # === Upload Endpoint ===
 @router.post("/upload-resumes")
-async def upload_zip(background_tasks: BackgroundTasks, db: Session = Depends(get_db), zipfile: UploadFile = File(...)):
-    job = UploadJob(id=str(uuid.uuid4()), status="starting", total_files=0, processed_files=0)
+def upload_zip(background_tasks: BackgroundTasks, db: Session = Depends(get_db), zipfile: UploadFile = File(...)):
+    # Plain def: FastAPI runs it on the threadpool, so the file copy and the sync
+    # session never block the event loop, however large the archive is
+    job_id = str(uuid.uuid4())
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    zip_path = os.path.abspath(os.path.join(settings.upload_dir, f"{job_id}.zip"))
+
+    # Copy the upload in fixed-size chunks instead of reading the whole archive into memory
+    with open(zip_path, "wb") as out:
+        shutil.copyfileobj(zipfile.file, out, UPLOAD_CHUNK_SIZE)
+
+    # The job row is the queue entry; it only becomes claimable once the archive is fully written
+    job = UploadJob(id=job_id, zip_path=zip_path, status="queued", total_files=0, processed_files=0, skipped_duplicates=0)
+    if settings.ingest_in_process:
+        job.status = "processing"
+        job.worker_id = f"api:{os.getpid()}"
+        job.heartbeat_at = datetime.utcnow()
+        job.attempts = 1
     db.add(job)
     db.commit()
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp:
-        tmp.write(await zipfile.read())
-        zip_path = tmp.name
+    if settings.ingest_in_process:
+        background_tasks.add_task(run_claimed_job, job_id, zip_path, job.worker_id)
 
-    background_tasks.add_task(process_zip_file_for_api, zip_path, job.id)
-
-    return {"message": "Upload received and is being processed in the background.", "job_id": job.id}
+    return {"message": "Upload received and queued for processing.", "job_id": job_id}
 
 # === Upload Status ===
-@router.get("/upload-status/{job_id}")
-def upload_status(job_id: str, db: Session = Depends(get_db)):
-    job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
+TERMINAL_JOB_STATUSES = {"completed", "completed_with_errors", "failed"}
+SSE_KEEPALIVE_SECONDS = 15
+
+def job_status(job: UploadJob) -> dict:
+    processed = job.processed_files or 0
+    skipped = job.skipped_duplicates or 0
+    remaining = max(0, (job.total_files or 0) - processed - skipped)
+    eta = round(remaining / job.throughput, 1) if job.throughput and job.status not in TERMINAL_JOB_STATUSES else None
     return {
         "job_id": job.id,
         "status": job.status,
-        "processed": job.processed_files,
+        "stage": job.stage,
+        "extracted": job.extracted_files,
+        "processed": processed,
         "total": job.total_files,
-        "done": job.status == "done"
+        "skipped_duplicates": skipped,
+        "throughput": job.throughput,
+        "eta_seconds": eta,
+        "stage_timings": job.stage_timings or {},
+        "error": job.error,
+        "done": job.status in TERMINAL_JOB_STATUSES,
     }
 
+@router.get("/upload-status/{job_id}")
+def upload_status(job_id: str, db: Session = Depends(get_db)):
+    job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+@router.get("/upload-status/{job_id}/stream")
+async def upload_status_stream(job_id: str, request: Request):
+    """
+    Server-Sent Events feed of job progress. The server reads the job row once per
+    progress_stream_interval and pushes only when it changed, replacing client polling.
+    """
+    async with AsyncSessionLocal() as db:
+        if not await db.get(UploadJob, job_id):
+            raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last_sent = None
+        last_write = time.monotonic()
+        while not await request.is_disconnected():
+            async with AsyncSessionLocal() as db:
+                job = await db.get(UploadJob, job_id)
+            if job is None:
+                yield "event: error\ndata: {\"detail\": \"Job not found\"}\n\n"
+                return
+
+            status_data = job_status(job)
+            if status_data != last_sent:
+                yield f"data: {json.dumps(status_data, default=str)}\n\n"
+                last_sent = status_data
+                last_write = time.monotonic()
+            elif time.monotonic() - last_write >= SSE_KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                last_write = time.monotonic()
+
+            if status_data["done"]:
+                return
+            await asyncio.sleep(settings.progress_stream_interval)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # === Search ===
 class SearchRequest(BaseModel):
     job_description: str
-    top_k: int = 10
+    top_k: int = Field(10, ge=1, le=settings.search_pool_max)  # results come from at most search_pool_max hits
+    filters: Optional[SearchFilters] = None
+    rerank_mode: Optional[Literal["llm", "cross-encoder", "cascade"]] = None  # None = settings.rerank_mode
+
+class BatchSearchRequest(BaseModel):
+    job_descriptions: List[str]
+    top_k: int = Field(10, ge=1, le=settings.search_pool_max)
+    filters: Optional[SearchFilters] = None
+    rerank_mode: Optional[Literal["llm", "cross-encoder", "cascade"]] = None
 
 class CandidateProfile(ResumeOut):
     score: float
 
+class BatchSearchResult(BaseModel):
+    job_description: str
+    results: List[CandidateProfile]
+
+def server_timing(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in timings.items())
+
+PROFILE_COLUMNS = (
+    Resume.id, Resume.document_id, Resume.name, Resume.email, Resume.mobile_number,
+    Resume.years_experience, Resume.skills, Resume.prev_roles, Resume.location,
+)
+
+async def fetch_profiles(db: AsyncSession, doc_ids: List[str]) -> Dict[str, dict]:
+    """Profile dicts straight from the needed columns, without loading ORM objects."""
+    rows = (await db.execute(select(*PROFILE_COLUMNS).where(Resume.document_id.in_(doc_ids)))).mappings().all()
+    profiles = {}
+    for row in rows:
+        profile = dict(row)
+        profile["email"] = clean_email(profile["email"])
+        profile["skills"] = profile["skills"] or []
+        profile["prev_roles"] = profile["prev_roles"] or []
+        profiles[profile["document_id"]] = profile
+    return profiles
+
+async def load_profiles(db: AsyncSession, doc_ids: List[str], payloads: Dict[str, dict]) -> Dict[str, dict]:
+    """
+    Profiles from the Qdrant payload when it carries them (profiles_in_payload), else from
+    Postgres. Payload profiles are only served for resumes that still have a row (one
+    index-only lookup), so vectors left behind by a failed cleanup never surface.
+    """
+    profiles = {}
+    if settings.profiles_in_payload:
+        for doc_id in doc_ids:
+            profile = profile_from_payload(payloads.get(doc_id))
+            if profile:
+                profiles[doc_id] = profile
+    from_payload = set(profiles)
+    if from_payload:
+        live = set((await db.execute(
+            select(Resume.document_id).where(Resume.document_id.in_(list(from_payload)))
+        )).scalars())
+        profiles = {doc_id: profile for doc_id, profile in profiles.items() if doc_id in live}
+    missing = [doc_id for doc_id in doc_ids if doc_id not in from_payload]
+    if missing:
+        profiles.update(await fetch_profiles(db, missing))
+    return profiles
+
+def ranked_profiles(scores: List[CandidateScore], profiles: Dict[str, dict]) -> List[dict]:
+    # Candidates deleted from Postgres since they were indexed have no profile and are skipped
+    return [{**profiles[s.id], "score": round(s.score, 2)} for s in scores if s.id in profiles]
+
 @router.post("/search", response_model=List[CandidateProfile])
-async def search_resumes(request: SearchRequest, db: Session = Depends(get_db)):
+async def search_resumes(request: SearchRequest, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """
+    Blocking search: responds once reranking is done, with per-stage latency in the
+    Server-Timing header.
+    """
+    timings: Dict[str, float] = {}
+    payloads: Dict[str, dict] = {}
+    started = time.perf_counter()
     try:
-        search_results = run_search_pipeline(request.job_description, request.top_k)
-        if not search_results:
-            return []
+        search_results = await run_search_pipeline_async(
+            request.job_description, request.top_k, db=db, filters=request.filters,
+            rerank_mode=request.rerank_mode, timings=timings, payloads=payloads,
+        )
+
+        profiles_started = time.perf_counter()
+        profiles = await load_profiles(db, [r.id for r in search_results], payloads)
+        timings["profiles"] = (time.perf_counter() - profiles_started) * 1000
+
+        content = ranked_profiles(search_results, profiles)
+        timings["total"] = (time.perf_counter() - started) * 1000
+        response.headers["Server-Timing"] = server_timing(timings)
+        return content
+
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
 
-        doc_ids = [r.id for r in search_results]
-        scores_map = {r.id: round(r.score, 2) for r in search_results}
+@router.post("/search/batch", response_model=List[BatchSearchResult])
+async def search_resumes_batch(request: BatchSearchRequest, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """
+    Several job descriptions against the same resume pool in one call: one batched
+    encode, one Qdrant round-trip and a shared rerank pass. Results come back per JD,
+    in request order, each shaped like a /search response.
+    """
+    if not request.job_descriptions:
+        raise HTTPException(status_code=400, detail="No job descriptions provided.")
+    if len(request.job_descriptions) > settings.batch_search_max_jds:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_search_max_jds} job descriptions per batch.")
 
-        # Fetch from the single Resume table
-        profiles_from_db = db.query(Resume).filter(Resume.document_id.in_(doc_ids)).all()
+    timings: Dict[str, float] = {}
+    payloads: Dict[str, dict] = {}
+    started = time.perf_counter()
+    try:
+        results_by_jd = await run_batch_search_pipeline(
+            request.job_descriptions, request.top_k, db=db, filters=request.filters,
+            rerank_mode=request.rerank_mode, timings=timings, payloads=payloads,
+        )
 
-        response_profiles = []
-        for profile in profiles_from_db:
-            profile_data = {c.key: getattr(profile, c.key) for c in inspect(profile).mapper.column_attrs}
-            profile_data['score'] = scores_map.get(profile.document_id, 0.0)
-            email_value = profile_data.get('email')
-            if not email_value or email_value == "NA":
-                profile_data['email'] = None
-            response_profiles.append(CandidateProfile(**profile_data))
+        # One profile lookup for every candidate across the batch
+        profiles_started = time.perf_counter()
+        doc_ids = list(dict.fromkeys(r.id for results in results_by_jd for r in results))
+        profiles = await load_profiles(db, doc_ids, payloads)
+        timings["profiles"] = (time.perf_counter() - profiles_started) * 1000
 
-        response_profiles.sort(key=lambda p: p.score, reverse=True)
-        return response_profiles
+        content = [
+            {"job_description": jd, "results": ranked_profiles(results, profiles)}
+            for jd, results in zip(request.job_descriptions, results_by_jd)
+        ]
+        timings["total"] = (time.perf_counter() - started) * 1000
+        response.headers["Server-Timing"] = server_timing(timings)
+        return content
 
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/search/stream")
+async def search_resumes_stream(request: SearchRequest):
+    """
+    Streaming search as NDJSON, one event per line:
+
+    {"event": "shortlist", "results": [...]}   vector-ranked profiles, right after the vector search
+    {"event": "update", "scores": [{"id", "score"}, ...]}   as each rerank batch finishes
+    {"event": "final", "results": [...], "timings": {...}}  the ordered top_k
+    """
+    async def events():
+        timings: Dict[str, float] = {}
+        payloads: Dict[str, dict] = {}
+        started = time.perf_counter()
+        profiles: Dict[str, dict] = {}
+        # Own session: the stream outlives the request-scoped dependency
+        async with AsyncSessionLocal() as db:
+            try:
+                async for event, scores in iter_search_pipeline(
+                    request.job_description, request.top_k, db=db, filters=request.filters,
+                    rerank_mode=request.rerank_mode, timings=timings, payloads=payloads,
+                ):
+                    if event == "shortlist":
+                        # Profiles for the whole pool, so later updates only need ids and scores
+                        profiles = await load_profiles(db, list(payloads), payloads)
+                        timings["first_result"] = (time.perf_counter() - started) * 1000
+                        message = {"event": event, "results": ranked_profiles(scores, profiles)}
+                    elif event == "update":
+                        message = {"event": event, "scores": [{"id": s.id, "score": s.score} for s in scores]}
+                    else:
+                        timings["total"] = (time.perf_counter() - started) * 1000
+                        message = {"event": event, "results": ranked_profiles(scores, profiles), "timings": timings}
+                    yield json.dumps(message, default=str) + "\n"
+            except Exception as e:
+                traceback.print_exc()
+                yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # === View Single Profile ===
 @router.get("/profile/{document_id}", response_model=ResumeOut)
-async def get_profile(document_id: str, db: Session = Depends(get_db)):
-    profile = db.query(Resume).filter(Resume.document_id == document_id).first()
+async def get_profile(document_id: str, db: AsyncSession = Depends(get_async_db)):
+    profile = (await db.execute(select(Resume).where(Resume.document_id == document_id))).scalars().first()
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     return profile
@@ -103,19 +321,36 @@ def clear_all_resumes(db: Session = Depends(get_db)):
     """
     Deletes all resume records from PostgreSQL and Qdrant.
     Re-initializes Qdrant collection to avoid downstream errors.
+    Refused while uploads are queued or processing: their workers still own the job rows.
     """
+    active = db.query(UploadJob.id).filter(UploadJob.status.in_(("queued", "processing"))).count()
+    if active:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{active} upload job(s) still queued or processing; clear again once they finish.",
+        )
+
     try:
         # 1. Delete vectors from Qdrant
         qdrant.delete_collection(settings.qdrant_collection)
         logger.info(f"🗑️ Qdrant collection '{settings.qdrant_collection}' deleted.")
-        #2. Delete all upload jobs
-        db.query(UploadJob).delete()
+        setup_qdrant_collection()  # recreate it empty, with its payload indexes
+        #2. Delete finished upload jobs and any archive they left behind (a job queued since the check stays)
+        finished = db.query(UploadJob).filter(UploadJob.status.in_(tuple(TERMINAL_JOB_STATUSES)))
+        for (zip_path,) in finished.with_entities(UploadJob.zip_path).all():
+            if zip_path and os.path.exists(zip_path):
+                os.unlink(zip_path)
+        finished.delete(synchronize_session=False)
         db.commit()
         logger.info("🧹 UploadJob table cleared.")
         # 3. Clear all resume records from Postgres
         deleted_rows = db.query(Resume).delete()
         db.commit()
         logger.info(f"🗑️ Deleted {deleted_rows} resume records from PostgreSQL.")
+        # 4. Cached rerank scores refer to the deleted resumes
+        db.query(RerankScore).delete()
+        db.commit()
+        logger.info("🧹 Rerank score cache cleared.")
 
         return {
             "status": "success",
@@ -152,4 +387,7 @@ def get_admin_status(db: Session = Depends(get_db)):
         "qdrant_status": qdrant_status,
         "vector_count": vector_count,
         "resume_count": resume_count,
+        "query_embedding_cache": query_cache.stats(),
+        "db_pool": pool_status(),
+        "auth_cache": user_cache.stats(),
     }
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import List, Optional
 
 class SignUpRequest(BaseModel):
@@ -20,6 +20,11 @@ class UserOut(BaseModel):
     class Config:
         from_attributes = True
 
+def clean_email(v):
+    if not v or v in ("NA", "") or "@" not in v:
+        return None
+    return v
+
 class ResumeOut(BaseModel):
     id: int
     document_id: str
@@ -37,10 +42,52 @@ class ResumeOut(BaseModel):
     @field_validator('email', mode='before')
     @classmethod
     def clean_email(cls, v):
-        if not v or v in ("NA", "") or "@" not in v:
-            return None
-        return v
+        return clean_email(v)
         
+class SearchFilters(BaseModel):
+    """Structured constraints applied inside the vector search (Qdrant payload filters)."""
+    min_experience: Optional[float] = Field(None, ge=0)
+    max_experience: Optional[float] = Field(None, ge=0)
+    location: Optional[str] = None
+    skills: List[str] = []  # must-have; every skill has to match
+
 class JobDescriptionInput(BaseModel):
     description: str  
-    top_k: int
\ No newline at end of file
+    top_k: int
+
+
+class JobCreate(BaseModel):
+    title: str
+    description: str
+    location: Optional[str] = None
+    is_open: bool = True
+
+class JobUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None  # re-embedded when changed
+    location: Optional[str] = None
+    is_open: Optional[bool] = None
+
+    @field_validator('title', 'description', 'is_open')
+    @classmethod
+    def not_null(cls, v, info):
+        # Omit a field to leave it unchanged; only location can be cleared with null
+        if v is None:
+            raise ValueError(f"{info.field_name} cannot be null")
+        return v
+
+class JobOut(BaseModel):
+    id: str
+    title: str
+    description: str
+    location: Optional[str] = None
+    is_open: bool
+
+    class Config:
+        from_attributes = True
+
+class MatchingJob(BaseModel):
+    id: str
+    title: str
+    location: Optional[str] = None
+    score: int  # 1-100, on the same scale as /search vector scores
@@ -0,0 +1,75 @@
+import math
+from typing import List, Tuple
+
+from config import settings
+
+
+def pool_size(
+    top_k: int,
+    multiplier: float = settings.search_pool_multiplier,
+    minimum: int = settings.search_pool_min,
+    maximum: int = settings.search_pool_max,
+) -> int:
+    """
+    How many vector hits to retrieve for a request asking for top_k results, clamped to
+    [minimum, maximum]. /search rejects top_k above search_pool_max, so the pool always
+    holds top_k; the cap keeps any other caller from sending hundreds of hits to the LLM.
+    """
+    return min(maximum, max(minimum, math.ceil(top_k * multiplier), top_k))
+
+
+def dropoff_cut(scores: List[float], keep: int, max_gap: float = settings.search_dropoff_gap) -> int:
+    """
+    Number of candidates to keep from vector scores sorted high to low. Cuts at the first
+    gap between neighbours wider than max_gap, but never below `keep`.
+    """
+    if max_gap <= 0:
+        return len(scores)
+    for i in range(max(1, keep), len(scores)):
+        if scores[i - 1] - scores[i] > max_gap:
+            return i
+    return len(scores)
+
+
+def confident_head(
+    scores: List[float],
+    top_k: int,
+    margin: float = settings.rerank_skip_margin,
+    min_score: float = settings.rerank_skip_min_score,
+) -> int:
+    """
+    Length of the leading run of candidates that is separated from everything below it
+    by at least `margin` in vector score (capped at top_k). These are in the result
+    whatever the LLM says, so they are not sent to it.
+    """
+    if margin <= 0:
+        return 0
+    for h in range(min(top_k, len(scores)), 0, -1):
+        if scores[h - 1] < min_score:
+            continue
+        if h == len(scores) or scores[h - 1] - scores[h] >= margin:
+            return h
+    return 0
+
+
+def plan_candidates(scores: List[float], top_k: int, **params) -> Tuple[int, int]:
+    """
+    Returns (head, keep) for candidates sorted by vector score: candidates[:head] skip the
+    LLM, candidates[head:keep] are reranked, the rest are dropped.
+    """
+    keep = dropoff_cut(scores, top_k, params.get("max_gap", settings.search_dropoff_gap))
+    head = confident_head(
+        scores[:keep],
+        top_k,
+        params.get("margin", settings.rerank_skip_margin),
+        params.get("min_score", settings.rerank_skip_min_score),
+    )
+    if head >= top_k:
+        keep = head
+    return head, keep
+
+
+def vector_to_score(similarity: float, threshold: float = settings.search_score_threshold) -> int:
+    """Maps a cosine similarity above the threshold onto the LLM's 1-100 scale."""
+    span = max(1e-6, 1.0 - threshold)
+    return max(1, min(100, round(100 * (similarity - threshold) / span)))
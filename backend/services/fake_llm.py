@@ -0,0 +1,45 @@
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, Dict
+
+from services.rerank import CandidateScore, CandidateScores, JobCandidateScore, JobCandidateScores
+
+
+class FakeRankingChain:
+    """
+    Local stand-in for the Groq ranking chain with a fixed per-call latency.
+    Scores are derived from a hash of (job description, candidate id), so runs are repeatable
+    and a combined multi-JD prompt scores each pair exactly as a single-JD prompt would.
+    """
+
+    def __init__(self, latency: float = 1.0):
+        self.latency = latency
+        self.calls = 0
+
+    @staticmethod
+    def _pair_score(job_description: str, document_id: str) -> int:
+        return hashlib.sha256(f"{job_description}|{document_id}".encode()).digest()[0] % 100 + 1
+
+    def _score(self, inputs: Dict[str, Any]):
+        self.calls += 1
+        candidates = json.loads(inputs["candidates"])
+        if "job_descriptions" in inputs:
+            descriptions = {j["job"]: j["description"] for j in json.loads(inputs["job_descriptions"])}
+            return JobCandidateScores(results=[
+                JobCandidateScore(job=job, id=c["id"], score=self._pair_score(descriptions[job], c["id"]))
+                for c in candidates for job in c["jobs"]
+            ])
+        return CandidateScores(results=[
+            CandidateScore(id=c["id"], score=self._pair_score(inputs["job_description"], c["id"]))
+            for c in candidates
+        ])
+
+    def invoke(self, inputs: Dict[str, Any]) -> CandidateScores:
+        time.sleep(self.latency)
+        return self._score(inputs)
+
+    async def ainvoke(self, inputs: Dict[str, Any]) -> CandidateScores:
+        await asyncio.sleep(self.latency)
+        return self._score(inputs)
@@ -0,0 +1,406 @@
+import json
+import time
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+from utils.logger import logger
+
+
+class CandidateScore(BaseModel):
+    id: str = Field(description="The document ID of the candidate")
+    score: int = Field(ge=1, le=100, description="Match score from 1 to 100")
+
+class CandidateScores(BaseModel):
+    results: List[CandidateScore]
+
+class JobCandidateScore(BaseModel):
+    job: int = Field(description="The index of the job description the score is for")
+    id: str = Field(description="The document ID of the candidate")
+    score: int = Field(ge=1, le=100, description="Match score from 1 to 100")
+
+class JobCandidateScores(BaseModel):
+    results: List[JobCandidateScore]
+
+
+def chunk_candidates(candidates: List[dict], batch_size: int) -> List[List[dict]]:
+    return [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+
+
+async def _score_batch(
+    chain: Any,
+    semaphore: asyncio.Semaphore,
+    batch_no: int,
+    inputs: Dict[str, Any],
+    timeout: float,
+) -> List[CandidateScore]:
+    async with semaphore:
+        try:
+            result = await asyncio.wait_for(chain.ainvoke(inputs), timeout=timeout)
+            return result.results
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Batch {batch_no} timed out after {timeout}s")
+        except Exception as e:
+            logger.warning(f"⚠️ Batch {batch_no} failed: {e}")
+        return []
+
+
+def _batch_jobs(
+    chain: Any,
+    job_description: str,
+    candidates: List[dict],
+    format_instructions: str,
+    batch_size: int,
+    concurrency: int,
+    timeout: float,
+) -> list:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    return [
+        _score_batch(chain, semaphore, batch_no, {
+            "job_description": job_description,
+            "candidates": json.dumps(batch),
+            "format_instructions": format_instructions,
+        }, timeout)
+        for batch_no, batch in enumerate(chunk_candidates(candidates, batch_size), start=1)
+    ]
+
+
+async def rerank_batches(
+    chain: Any,
+    job_description: str,
+    candidates: List[dict],
+    format_instructions: str,
+    batch_size: int = 20,
+    concurrency: int = 4,
+    timeout: float = 30.0,
+) -> List[CandidateScore]:
+    """
+    Scores candidate batches concurrently, at most `concurrency` LLM calls in flight.
+    Failed or timed-out batches are dropped so the remaining scores are still returned.
+    """
+    jobs = _batch_jobs(chain, job_description, candidates, format_instructions, batch_size, concurrency, timeout)
+
+    all_ranked: List[CandidateScore] = []
+    for batch_result in await asyncio.gather(*jobs):
+        all_ranked.extend(batch_result)
+    return all_ranked
+
+
+async def iter_rerank_batches(
+    chain: Any,
+    job_description: str,
+    candidates: List[dict],
+    format_instructions: str,
+    batch_size: int = 20,
+    concurrency: int = 4,
+    timeout: float = 30.0,
+) -> AsyncIterator[List[CandidateScore]]:
+    """
+    Same fan-out as rerank_batches, but yields each batch's scores as soon as it finishes.
+    Batches still running are cancelled if the consumer stops early (e.g. client disconnect).
+    """
+    tasks = [
+        asyncio.ensure_future(job)
+        for job in _batch_jobs(chain, job_description, candidates, format_instructions, batch_size, concurrency, timeout)
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            batch_result = await finished
+            if batch_result:
+                yield batch_result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def merge_job_candidates(candidates_by_job: List[List[dict]]) -> List[dict]:
+    """One entry per distinct candidate, with `jobs` listing the JD indexes it is scored against."""
+    merged: Dict[str, dict] = {}
+    for job, candidates in enumerate(candidates_by_job):
+        for candidate in candidates:
+            merged.setdefault(candidate["id"], {**candidate, "jobs": []})["jobs"].append(job)
+    # Candidates wanted by the same JDs end up in the same prompts, keeping each prompt's JD list short
+    return sorted(merged.values(), key=lambda c: c["jobs"])
+
+
+def chunk_by_pairs(candidates: List[dict], max_pairs: int) -> List[List[dict]]:
+    """Batches merged candidates so each prompt asks for at most `max_pairs` (JD, candidate) scores."""
+    batches, batch, pairs = [], [], 0
+    for candidate in candidates:
+        if batch and pairs + len(candidate["jobs"]) > max_pairs:
+            batches.append(batch)
+            batch, pairs = [], 0
+        batch.append(candidate)
+        pairs += len(candidate["jobs"])
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def rerank_jobs_combined(
+    chain: Any,
+    job_descriptions: List[str],
+    candidates_by_job: List[List[dict]],
+    format_instructions: str,
+    max_pairs: int = 60,
+    concurrency: int = 4,
+    timeout: float = 30.0,
+) -> List[List[CandidateScore]]:
+    """
+    Scores the candidates of several JDs with combined prompts: a candidate retrieved for
+    several JDs is listed once, with the JDs to score it against, instead of once per JD.
+    Returns the scores per JD; pairs that were not asked for are ignored.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    jobs = []
+    for batch_no, batch in enumerate(chunk_by_pairs(merge_job_candidates(candidates_by_job), max_pairs), start=1):
+        needed = sorted({job for candidate in batch for job in candidate["jobs"]})
+        jobs.append(_score_batch(chain, semaphore, batch_no, {
+            "job_descriptions": json.dumps([{"job": job, "description": job_descriptions[job]} for job in needed]),
+            "candidates": json.dumps(batch),
+            "format_instructions": format_instructions,
+        }, timeout))
+
+    wanted = {(job, c["id"]) for job, candidates in enumerate(candidates_by_job) for c in candidates}
+    scores: List[Dict[str, CandidateScore]] = [{} for _ in job_descriptions]
+    for batch_result in await asyncio.gather(*jobs):
+        for s in batch_result:
+            if (s.job, s.id) in wanted:
+                scores[s.job][s.id] = CandidateScore(id=s.id, score=s.score)
+    return [list(job_scores.values()) for job_scores in scores]
+
+
+# === Reranker backends ===
+RERANK_MODES = ("llm", "cross-encoder", "cascade")
+
+
+class ScoreBatch(list):
+    """
+    Scores from a reranker, where `provisional` holds the ids whose score is only a
+    stand-in (the cascade's fast-stage score before, or instead of, the slow stage's).
+    Provisional scores are shown but never written to the score cache.
+    """
+
+    def __init__(self, scores=(), provisional=()):
+        super().__init__(scores)
+        self.provisional = set(provisional)
+
+
+def cacheable(scores: List[CandidateScore]) -> List[CandidateScore]:
+    """The scores that may be cached: all of them, minus a ScoreBatch's provisional ones."""
+    provisional = getattr(scores, "provisional", ())
+    return [s for s in scores if s.id not in provisional]
+
+
+def candidate_text(candidate: dict) -> str:
+    return (
+        f"Skills: {', '.join(candidate.get('skills') or [])}\n"
+        f"Experience: {candidate.get('experience') or 0} years\n"
+        f"Roles: {', '.join(candidate.get('roles') or [])}"
+    )
+
+
+class Reranker(ABC):
+    """
+    Scores candidates against a job description on the 1-100 scale. `name` keys the
+    score cache; `stage` labels its time in the per-request timings.
+
+    Backends implement iter_scores, yielding scores as they become available; a later
+    score for the same candidate replaces an earlier one. score() collects the result.
+    """
+
+    name = "reranker"
+    stage = "rerank"
+
+    @abstractmethod
+    def iter_scores(
+        self,
+        job_description: str,
+        candidates: List[dict],
+        top_k: int,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> AsyncIterator[List[CandidateScore]]:
+        """Async generator of score batches; implemented by each backend."""
+
+    async def score(
+        self,
+        job_description: str,
+        candidates: List[dict],
+        top_k: int,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> List[CandidateScore]:
+        latest: Dict[str, CandidateScore] = {}
+        provisional = set()
+        async for batch in self.iter_scores(job_description, candidates, top_k, timings):
+            latest.update((s.id, s) for s in batch)
+            provisional = (provisional - {s.id for s in batch}) | getattr(batch, "provisional", set())
+        return ScoreBatch(latest.values(), provisional=provisional)
+
+    async def score_jobs(
+        self,
+        job_descriptions: List[str],
+        candidates_by_job: List[List[dict]],
+        top_ks: List[int],
+        timings: Optional[Dict[str, float]] = None,
+    ) -> List[List[CandidateScore]]:
+        """
+        Scores the candidates of several JDs, returning scores per JD. Backends that can
+        share work across JDs override this; by default each JD is scored on its own.
+        """
+        return list(await asyncio.gather(*(
+            self.score(job_description, candidates, top_k, timings)
+            for job_description, candidates, top_k in zip(job_descriptions, candidates_by_job, top_ks)
+        )))
+
+    def _record(self, timings: Optional[Dict[str, float]], started: float):
+        if timings is not None:
+            timings[self.stage] = timings.get(self.stage, 0.0) + (time.perf_counter() - started) * 1000
+
+
+class LLMReranker(Reranker):
+    """
+    Remote LLM chain (Groq, or the fake stub), batched and fanned out by iter_rerank_batches.
+    With a `multi_chain`, score_jobs sends candidates shared by several JDs in combined prompts.
+    """
+
+    stage = "llm"
+
+    def __init__(self, chain: Any, format_instructions: str, name: str, batch_size: int = 20,
+                 concurrency: int = 4, timeout: float = 30.0, multi_chain: Any = None,
+                 multi_format_instructions: str = "", max_pairs: int = 60):
+        self.chain = chain
+        self.format_instructions = format_instructions
+        self.name = name
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.multi_chain = multi_chain
+        self.multi_format_instructions = multi_format_instructions
+        self.max_pairs = max_pairs
+
+    async def score_jobs(self, job_descriptions, candidates_by_job, top_ks, timings=None):
+        if self.multi_chain is None:
+            return await super().score_jobs(job_descriptions, candidates_by_job, top_ks, timings)
+        started = time.perf_counter()
+        try:
+            return await rerank_jobs_combined(
+                self.multi_chain, job_descriptions, candidates_by_job, self.multi_format_instructions,
+                max_pairs=self.max_pairs, concurrency=self.concurrency, timeout=self.timeout,
+            )
+        finally:
+            self._record(timings, started)
+
+    async def iter_scores(self, job_description, candidates, top_k, timings=None):
+        if not candidates:
+            return
+        started = time.perf_counter()
+        ids = {c["id"] for c in candidates}
+        try:
+            async for batch in iter_rerank_batches(
+                self.chain, job_description, candidates, self.format_instructions,
+                batch_size=self.batch_size, concurrency=self.concurrency, timeout=self.timeout,
+            ):
+                batch = [s for s in batch if s.id in ids]
+                if batch:
+                    yield batch
+        finally:
+            self._record(timings, started)
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    Local CPU cross-encoder (sentence-transformers). Loaded on first use and run on the
+    given executor, so it never blocks the event loop.
+    """
+
+    stage = "cross_encoder"
+
+    def __init__(self, model_name: str, executor: Optional[Executor] = None, batch_size: int = 32):
+        self.model_name = model_name
+        self.name = f"cross-encoder:{model_name}"
+        self.executor = executor
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import torch
+                    from sentence_transformers import CrossEncoder
+
+                    logger.info(f"⏳ Loading cross-encoder {self.model_name}...")
+                    # Scores are read as 0-1 probabilities, whatever activation the hub config names
+                    try:
+                        self._model = CrossEncoder(self.model_name, activation_fn=torch.nn.Sigmoid())
+                    except TypeError:  # sentence-transformers < 4 (e.g. pinned by InstructorEmbedding)
+                        self._model = CrossEncoder(self.model_name, default_activation_function=torch.nn.Sigmoid())
+                    logger.info(f"✅ Cross-encoder {self.model_name} loaded.")
+        return self._model
+
+    def _predict(self, job_description: str, candidates: List[dict]) -> List[float]:
+        pairs = [(job_description, candidate_text(c)) for c in candidates]
+        return list(self._get_model().predict(pairs, batch_size=self.batch_size, show_progress_bar=False))
+
+    async def iter_scores(self, job_description, candidates, top_k, timings=None):
+        if not candidates:
+            return
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        probabilities = await loop.run_in_executor(self.executor, self._predict, job_description, candidates)
+        self._record(timings, started)
+        yield [
+            CandidateScore(id=c["id"], score=max(1, min(100, round(float(p) * 100))))
+            for c, p in zip(candidates, probabilities)
+        ]
+
+
+class CascadeReranker(Reranker):
+    """
+    The fast reranker scores the whole pool; only its best `max(top_k, final_candidates)`
+    go to the slow one. Candidates the slow stage fails to score keep their fast score,
+    marked provisional so it is never cached under the cascade's name.
+    """
+
+    def __init__(self, fast: Reranker, slow: Reranker, final_candidates: int = 10):
+        self.fast = fast
+        self.slow = slow
+        self.final_candidates = final_candidates
+        self.name = f"cascade:{fast.name}>{slow.name}"
+
+    async def iter_scores(self, job_description, candidates, top_k, timings=None):
+        fast_scores = await self.fast.score(job_description, candidates, top_k, timings)
+        fast_scores.sort(key=lambda s: s.score, reverse=True)
+        shortlisted = fast_scores[:max(top_k, self.final_candidates)]
+        if not shortlisted:
+            return
+        # Only the shortlist is yielded, so candidates the fast stage cut never reach the result
+        yield ScoreBatch(shortlisted, provisional=(s.id for s in shortlisted))
+
+        shortlist_ids = {s.id for s in shortlisted}
+        shortlist = [c for c in candidates if c["id"] in shortlist_ids]
+        async for batch in self.slow.iter_scores(job_description, shortlist, top_k, timings):
+            yield batch
+
+    async def score_jobs(self, job_descriptions, candidates_by_job, top_ks, timings=None):
+        # Both stages batch across JDs, so the slow stage can share prompts between shortlists
+        fast_by_job = await self.fast.score_jobs(job_descriptions, candidates_by_job, top_ks, timings)
+        shortlisted_by_job, shortlists = [], []
+        for fast_scores, candidates, top_k in zip(fast_by_job, candidates_by_job, top_ks):
+            shortlisted = sorted(fast_scores, key=lambda s: s.score, reverse=True)[:max(top_k, self.final_candidates)]
+            shortlist_ids = {s.id for s in shortlisted}
+            shortlisted_by_job.append(shortlisted)
+            shortlists.append([c for c in candidates if c["id"] in shortlist_ids])
+
+        slow_by_job = await self.slow.score_jobs(job_descriptions, shortlists, top_ks, timings)
+        results = []
+        for shortlisted, slow_scores in zip(shortlisted_by_job, slow_by_job):
+            latest = {s.id: s for s in shortlisted}
+            latest.update((s.id, s) for s in slow_scores)
+            scored = {s.id for s in slow_scores}
+            results.append(ScoreBatch(latest.values(), provisional=(i for i in latest if i not in scored)))
+        return results
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import RerankScore
+from services.rerank import CandidateScore
+from utils.text_hash import normalize_text, text_hash
+
+
+def make_jd_hash(job_description: str, model_name: str) -> str:
+    return text_hash(model_name, normalize_text(job_description))
+
+def _fresh_after() -> datetime:
+    return datetime.utcnow() - timedelta(hours=settings.rerank_cache_ttl_hours)
+
+async def get_cached_scores(db: AsyncSession, jd_hash: str, document_ids: List[str]) -> Dict[str, int]:
+    """Returns {document_id: score} for candidates already scored against this JD within the TTL."""
+    if not document_ids:
+        return {}
+    rows = await db.execute(
+        select(RerankScore.document_id, RerankScore.score).where(
+            RerankScore.jd_hash == jd_hash,
+            RerankScore.document_id.in_(document_ids),
+            RerankScore.created_at >= _fresh_after(),
+        )
+    )
+    return {document_id: score for document_id, score in rows.all()}
+
+async def store_scores(db: AsyncSession, jd_hash: str, scores: List[CandidateScore]) -> None:
+    if not scores:
+        return
+    now = datetime.utcnow()
+    unique = {s.id: s.score for s in scores}  # one row per key, or ON CONFLICT rejects the insert
+    stmt = insert(RerankScore).values([
+        {"jd_hash": jd_hash, "document_id": document_id, "score": score, "created_at": now}
+        for document_id, score in unique.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RerankScore.jd_hash, RerankScore.document_id],
+        set_={"score": stmt.excluded.score, "created_at": stmt.excluded.created_at},
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+def invalidate_documents(db: Session, document_ids: Iterable[str]) -> int:
+    """Drops cached scores for deleted resumes. Caller commits."""
+    return db.execute(
+        delete(RerankScore).where(RerankScore.document_id.in_(list(document_ids)))
+    ).rowcount
+
+def purge_stale_scores(db: Session) -> int:
+    """Drops entries past the TTL. Caller commits."""
+    return db.execute(delete(RerankScore).where(RerankScore.created_at < _fresh_after())).rowcount
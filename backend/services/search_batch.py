@@ -1,26 +1,30 @@
 import os
-import json
-from typing import List
-from pydantic import BaseModel, Field
+import time
+import asyncio
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from langchain.output_parsers import PydanticOutputParser
 from langchain.prompts import load_prompt
 from langchain_groq import ChatGroq
+from sqlalchemy.ext.asyncio import AsyncSession
 from config import settings
-from utils.qdrant_client_wrapper import qdrant_client
-from qdrant_client.models import PointStruct
+from utils.qdrant_client_wrapper import async_qdrant_client, day_key
+from utils.partitions import live_since
+from qdrant_client.models import PointStruct, ScoredPoint, Filter, FieldCondition, MatchText, Range, QueryRequest
 from utils.logger import logger
-from utils.model_loader import model
+from utils.model_loader import ENCODER_ID, query_batcher, inference_executor
+from utils.embedding_cache import QueryEmbeddingCache
+from services.rerank import (
+    CandidateScore, CandidateScores, JobCandidateScores, Reranker, LLMReranker, CrossEncoderReranker,
+    CascadeReranker, RERANK_MODES, cacheable,
+)
+from services.fake_llm import FakeRankingChain
+from services import rerank_cache
+from services.candidate_pool import pool_size, plan_candidates, vector_to_score
+from schemas import SearchFilters
 
 # === LLM & Prompt Setup ===
 GROQ_MODEL = "llama-3.3-70b-versatile"
-BATCH_SIZE = 20
-
-class CandidateScore(BaseModel):
-    id: str = Field(description="The document ID of the candidate")
-    score: int = Field(ge=1, le=100, description="Match score from 1 to 100")
-
-class CandidateScores(BaseModel):
-    results: List[CandidateScore]
 
 parser = PydanticOutputParser(pydantic_object=CandidateScores)
 
@@ -34,46 +38,303 @@ llm = ChatGroq(
 )
 
 chain = prompt | llm | parser
+rerank_model_name = GROQ_MODEL
+
+# Combined prompt scoring candidates shared by several JDs (/search/batch)
+multi_parser = PydanticOutputParser(pydantic_object=JobCandidateScores)
+multi_prompt = load_prompt(os.path.join(os.path.dirname(__file__), "structured_multi_ranking_prompt.json"))
+multi_chain = multi_prompt | llm | multi_parser
+
+if settings.rerank_backend == "fake":
+    chain = FakeRankingChain(latency=settings.fake_llm_latency)
+    multi_chain = chain
+    rerank_model_name = "fake"
+    logger.info("🧪 Using fake local LLM for reranking.")
+
+# === Rerankers (selectable per request) ===
+llm_reranker = LLMReranker(
+    chain,
+    parser.get_format_instructions(),
+    name=rerank_model_name,
+    batch_size=settings.rerank_batch_size,
+    concurrency=settings.rerank_concurrency,
+    timeout=settings.rerank_batch_timeout,
+    multi_chain=multi_chain,
+    multi_format_instructions=multi_parser.get_format_instructions(),
+    max_pairs=settings.rerank_batch_pairs,
+)
+cross_encoder_reranker = CrossEncoderReranker(
+    settings.cross_encoder_model,
+    inference_executor,
+    batch_size=settings.cross_encoder_batch_size,
+)
+rerankers: Dict[str, Reranker] = {
+    "llm": llm_reranker,
+    "cross-encoder": cross_encoder_reranker,
+    "cascade": CascadeReranker(cross_encoder_reranker, llm_reranker, settings.cascade_llm_candidates),
+}
+
+def get_reranker(mode: Optional[str] = None) -> Reranker:
+    mode = mode or settings.rerank_mode
+    if mode not in rerankers:
+        raise ValueError(f"Unknown rerank mode '{mode}', expected one of {RERANK_MODES}")
+    return rerankers[mode]
+
+@contextmanager
+def timed(timings: Optional[Dict[str, float]], stage: str):
+    """Adds the block's wall time in ms to timings[stage]."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - started) * 1000
 
-# === Embedding and Qdrant Setup ===
-embedder = model
-qdrant = qdrant_client
-
-def run_search_pipeline(job_description: str, top_k: int = 10) -> List[CandidateScore]:
-    query_instruction = "Represent the job description for matching resumes:"
-    query_vector = embedder.encode([[query_instruction, job_description]])[0].tolist()
-
-    search_results = qdrant.query_points(
-        collection_name=settings.qdrant_collection,
-        query=query_vector,
-        score_threshold=0.55,
-        with_payload=True,
-        limit=50,
-    ).points
-
-    candidate_payloads = [
-        {
-            "id": p.payload.get("document_id"),
-            "skills": p.payload.get("skills", []),
-            "roles": p.payload.get("prev_roles", []),  # fixed key
-            "experience": p.payload.get("experience", 0),
-        }
-        for p in search_results
-        if p.payload and p.payload.get("document_id")
+# === Qdrant & Query Cache Setup ===
+QUERY_INSTRUCTION = "Represent the job description for matching resumes:"
+
+qdrant = async_qdrant_client
+query_cache = QueryEmbeddingCache(max_size=settings.query_cache_size, disk_path=settings.query_cache_path)
+
+async def get_query_vectors(job_descriptions: List[str]) -> List[list]:
+    """Returns the JD embeddings; cache misses are encoded together in one call."""
+    keys = [query_cache.make_key(jd, QUERY_INSTRUCTION, ENCODER_ID) for jd in job_descriptions]
+    vectors = await query_cache.get_many(keys)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        encoded = await query_batcher.encode([[QUERY_INSTRUCTION, job_descriptions[i]] for i in missing])
+        for i, vector in zip(missing, encoded):
+            vectors[i] = vector
+        query_cache.put_many([(keys[i], vectors[i]) for i in missing])
+    return [vector.tolist() for vector in vectors]
+
+async def get_query_vector(job_description: str) -> list:
+    """Returns the JD embedding, skipping the model entirely on a cache hit."""
+    return (await get_query_vectors([job_description]))[0]
+
+def build_search_filter(filters: Optional[SearchFilters]) -> Optional[Filter]:
+    """Turns request filters into a Qdrant filter over the indexed payload fields."""
+    must = []
+    if settings.storage_partitioned:
+        # Only live day partitions; days past the TTL may not have been dropped yet
+        must.append(FieldCondition(key="day", range=Range(gte=day_key(live_since()))))
+    if filters is None:
+        return Filter(must=must) if must else None
+
+    if filters.min_experience is not None or filters.max_experience is not None:
+        must.append(FieldCondition(
+            key="experience",
+            range=Range(gte=filters.min_experience, lte=filters.max_experience),
+        ))
+    if filters.location and filters.location.strip():
+        must.append(FieldCondition(key="location", match=MatchText(text=filters.location.strip())))
+    for skill in filters.skills:
+        if skill.strip():
+            must.append(FieldCondition(key="skills", match=MatchText(text=skill.strip())))
+    return Filter(must=must) if must else None
+
+def rerank_candidate(point: ScoredPoint) -> dict:
+    """The candidate fields a reranker sees, from the Qdrant payload."""
+    return {
+        "id": point.payload.get("document_id"),
+        "skills": point.payload.get("skills", []),
+        "roles": point.payload.get("prev_roles", []),  # fixed key
+        "experience": point.payload.get("experience", 0),
+    }
+
+def final_ranking(head_points: List[ScoredPoint], reranked: List[CandidateScore], top_k: int) -> List[CandidateScore]:
+    """The confident head first, then the reranked candidates by score."""
+    reranked = sorted(reranked, key=lambda x: x.score, reverse=True)
+    # The head outranks every reranked candidate, so its score never shows below theirs
+    floor = reranked[0].score if reranked else 1
+    leaders = [
+        CandidateScore(id=p.payload["document_id"], score=max(floor, vector_to_score(p.score)))
+        for p in head_points
     ]
+    return (leaders + reranked)[:top_k]
+
+async def iter_search_pipeline(
+    job_description: str,
+    top_k: int = 10,
+    db: Optional[AsyncSession] = None,
+    filters: Optional[SearchFilters] = None,
+    rerank_mode: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+    payloads: Optional[Dict[str, dict]] = None,
+) -> AsyncIterator[Tuple[str, List[CandidateScore]]]:
+    """
+    Embeds the JD, retrieves and trims the candidate pool, and reranks it with the
+    selected reranker, yielding progress as (event, scores):
+
+    - "shortlist": the top_k by vector similarity, right after the vector search
+    - "update":    rerank scores as they arrive (cached ones first); later ones win
+    - "final":     the ordered top_k
+
+    If `timings` is given, per-stage wall times (ms) are added to it; if `payloads`
+    is given, it receives the Qdrant payload of every candidate in the pool.
+    """
+    reranker = get_reranker(rerank_mode)
 
-    all_ranked = []
+    with timed(timings, "embed"):
+        query_vector = await get_query_vector(job_description)
 
-    for i in range(0, len(candidate_payloads), BATCH_SIZE):
-        batch = candidate_payloads[i:i + BATCH_SIZE]
+    # Filters are applied inside the HNSW search, so every retrieved candidate satisfies them
+    with timed(timings, "retrieve"):
+        search_results = (await qdrant.query_points(
+            collection_name=settings.qdrant_collection,
+            query=query_vector,
+            query_filter=build_search_filter(filters),
+            score_threshold=settings.search_score_threshold,
+            with_payload=True,
+            limit=pool_size(top_k),
+        )).points
+    search_results = [p for p in search_results if p.payload and p.payload.get("document_id")]
+
+    # Drop the tail after a sharp fall in similarity; clearly separated leaders skip reranking
+    head, keep = plan_candidates([p.score for p in search_results], top_k)
+    head_points, rerank_points = search_results[:head], search_results[head:keep]
+
+    if payloads is not None:
+        payloads.update((p.payload["document_id"], p.payload) for p in search_results[:keep])
+    yield "shortlist", [
+        CandidateScore(id=p.payload["document_id"], score=vector_to_score(p.score))
+        for p in search_results[:min(keep, top_k)]
+    ]
+
+    candidate_payloads = [rerank_candidate(p) for p in rerank_points]
+
+    # Reuse scores this reranker already computed for this JD; only unseen candidates are scored
+    cached = {}
+    if db is not None and candidate_payloads:
+        jd_hash = rerank_cache.make_jd_hash(job_description, reranker.name)
+        with timed(timings, "score_cache"):
+            cached = await rerank_cache.get_cached_scores(db, jd_hash, [c["id"] for c in candidate_payloads])
+    if cached:
+        yield "update", [CandidateScore(id=doc_id, score=score) for doc_id, score in cached.items()]
+    unseen = [c for c in candidate_payloads if c["id"] not in cached]
+
+    fresh: Dict[str, CandidateScore] = {}
+    provisional = set()  # stand-in scores (cascade fallback): shown, never cached
+    if unseen:
+        async for batch in reranker.iter_scores(job_description, unseen, max(0, top_k - head), timings):
+            fresh.update((s.id, s) for s in batch)
+            provisional = (provisional - {s.id for s in batch}) | getattr(batch, "provisional", set())
+            yield "update", batch
+
+    to_cache = [s for s in fresh.values() if s.id not in provisional]
+    if db is not None and to_cache:
         try:
-            result = chain.invoke({
-                "job_description": job_description,
-                "candidates": json.dumps(batch),
-                "format_instructions": parser.get_format_instructions()
-            })
-            all_ranked.extend(result.results)
+            with timed(timings, "score_cache"):
+                await rerank_cache.store_scores(db, jd_hash, to_cache)
         except Exception as e:
-            logger.warning(f"⚠️ Batch {i//BATCH_SIZE + 1} failed: {e}")
+            await db.rollback()
+            logger.warning(f"⚠️ Failed to cache rerank scores: {e}")
+
+    reranked = list(fresh.values()) + [CandidateScore(id=doc_id, score=score) for doc_id, score in cached.items()]
+    yield "final", final_ranking(head_points, reranked, top_k)
+
+async def run_search_pipeline_async(
+    job_description: str,
+    top_k: int = 10,
+    db: Optional[AsyncSession] = None,
+    filters: Optional[SearchFilters] = None,
+    rerank_mode: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+    payloads: Optional[Dict[str, dict]] = None,
+) -> List[CandidateScore]:
+    """Runs iter_search_pipeline to completion and returns the final ordered top_k."""
+    results: List[CandidateScore] = []
+    async for event, scores in iter_search_pipeline(
+        job_description, top_k, db=db, filters=filters, rerank_mode=rerank_mode,
+        timings=timings, payloads=payloads,
+    ):
+        if event == "final":
+            results = scores
+    return results
+
+async def run_batch_search_pipeline(
+    job_descriptions: List[str],
+    top_k: int = 10,
+    db: Optional[AsyncSession] = None,
+    filters: Optional[SearchFilters] = None,
+    rerank_mode: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+    payloads: Optional[Dict[str, dict]] = None,
+) -> List[List[CandidateScore]]:
+    """
+    Several JDs against the same resume pool: one encode call, one Qdrant round-trip
+    (query_batch_points) and one rerank pass over all JDs, in which the LLM reranker
+    scores a candidate retrieved for several JDs in a combined prompt. Pool trimming and
+    the score cache work as in iter_search_pipeline. Returns the final top_k per JD.
+    """
+    reranker = get_reranker(rerank_mode)
+    unique_jds = list(dict.fromkeys(job_descriptions))
+
+    with timed(timings, "embed"):
+        query_vectors = await get_query_vectors(unique_jds)
+
+    query_filter = build_search_filter(filters)
+    with timed(timings, "retrieve"):
+        responses = await qdrant.query_batch_points(
+            collection_name=settings.qdrant_collection,
+            requests=[
+                QueryRequest(
+                    query=vector,
+                    filter=query_filter,
+                    score_threshold=settings.search_score_threshold,
+                    with_payload=True,
+                    limit=pool_size(top_k),
+                )
+                for vector in query_vectors
+            ],
+        )
+
+    heads: List[List[ScoredPoint]] = []
+    candidates_by_job: List[List[dict]] = []
+    for response in responses:
+        points = [p for p in response.points if p.payload and p.payload.get("document_id")]
+        head, keep = plan_candidates([p.score for p in points], top_k)
+        heads.append(points[:head])
+        candidates_by_job.append([rerank_candidate(p) for p in points[head:keep]])
+        if payloads is not None:
+            payloads.update((p.payload["document_id"], p.payload) for p in points[:keep])
+
+    jd_hashes = [rerank_cache.make_jd_hash(jd, reranker.name) for jd in unique_jds]
+    cached: List[Dict[str, int]] = [{} for _ in unique_jds]
+    if db is not None:
+        with timed(timings, "score_cache"):
+            for i, candidates in enumerate(candidates_by_job):
+                cached[i] = await rerank_cache.get_cached_scores(db, jd_hashes[i], [c["id"] for c in candidates])
+    unseen = [[c for c in candidates if c["id"] not in cached[i]] for i, candidates in enumerate(candidates_by_job)]
+
+    fresh = await reranker.score_jobs(
+        unique_jds, unseen, [max(0, top_k - len(head)) for head in heads], timings,
+    )
+
+    if db is not None:
+        try:
+            with timed(timings, "score_cache"):
+                for jd_hash, scores in zip(jd_hashes, fresh):
+                    await rerank_cache.store_scores(db, jd_hash, cacheable(scores))
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"⚠️ Failed to cache rerank scores: {e}")
+
+    ranked = {
+        jd: final_ranking(
+            heads[i],
+            fresh[i] + [CandidateScore(id=doc_id, score=score) for doc_id, score in cached[i].items()],
+            top_k,
+        )
+        for i, jd in enumerate(unique_jds)
+    }
+    return [ranked[jd] for jd in job_descriptions]
 
-    return sorted(all_ranked, key=lambda x: x.score, reverse=True)[:top_k]
+def run_search_pipeline(
+    job_description: str,
+    top_k: int = 10,
+    filters: Optional[SearchFilters] = None,
+    rerank_mode: Optional[str] = None,
+) -> List[CandidateScore]:
+    """Blocking wrapper for scripts and other callers without a running event loop."""
+    return asyncio.run(run_search_pipeline_async(job_description, top_k, filters=filters, rerank_mode=rerank_mode))
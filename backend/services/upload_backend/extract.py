@@ -0,0 +1,148 @@
+import io
+import os
+import re
+import queue
+import zipfile
+import tempfile
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from utils.logger import logger
+
+# Kept free of app-level imports: worker processes are spawned and import only this module.
+
+EXTRACT_BACKENDS = ("langchain", "pymupdf")
+
+def clean_text(text: str) -> str:
+    return re.sub(r'[\x00-\x1F\x7F]', '', text)
+
+# === Backends ===
+def _extract_langchain(filename: str, data: bytes) -> str:
+    from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader
+
+    suffix = Path(filename).suffix.lower()
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        tmp.write(data)
+        tmp_path = tmp.name
+    try:
+        loader = PyPDFLoader(tmp_path) if suffix == ".pdf" else Docx2txtLoader(tmp_path)
+        return "\n".join(p.page_content for p in loader.load())
+    finally:
+        os.unlink(tmp_path)
+
+def _extract_pymupdf(filename: str, data: bytes) -> str:
+    if filename.lower().endswith(".pdf"):
+        import pymupdf
+
+        with pymupdf.open(stream=data, filetype="pdf") as pdf:
+            return "\n".join(page.get_text() for page in pdf)
+
+    import docx
+
+    document = docx.Document(io.BytesIO(data))
+    lines = [p.text for p in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            lines.append(" ".join(cell.text for cell in row.cells))
+    return "\n".join(lines)
+
+def extract_bytes(filename: str, data: bytes, backend: str = "langchain") -> str:
+    """Runs in a pool worker: raw file bytes in, cleaned text out."""
+    if backend == "pymupdf":
+        return clean_text(_extract_pymupdf(filename, data))
+    return clean_text(_extract_langchain(filename, data))
+
+def extract_member(zip_path: str, info: zipfile.ZipInfo, backend: str = "langchain") -> str:
+    """
+    Runs in a pool worker: reads one member from the archive itself, so raw bytes only
+    exist inside a busy worker instead of waiting in the queue or crossing the pipe.
+    Reopening the ZIP per member costs a central-directory read, small next to extraction.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        data = zip_ref.read(info)
+    return extract_bytes(info.filename, data, backend)
+
+# === Process Pool ===
+_SENTINEL = object()
+
+class ExtractionPool:
+    """
+    Text extraction on a process pool. A feeder thread submits members by name (workers
+    read them from the ZIP) and futures flow to the caller through a bounded queue, so
+    at most `workers` raw files and `max_pending` extracted texts are held in memory no
+    matter how large the archive is.
+    """
+
+    def __init__(self, backend: str = "langchain", workers: int = 0, max_pending: int = 64):
+        if backend not in EXTRACT_BACKENDS:
+            raise ValueError(f"Unknown extract backend '{backend}', expected one of {EXTRACT_BACKENDS}")
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max(1, max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: never fork a process that holds the embedding model and live threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"✅ Extraction pool started ({self.workers} workers, backend={self.backend}).")
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _produce(self, zip_path: str, members: List[zipfile.ZipInfo], out: queue.Queue, stop: threading.Event):
+        def put(item):
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for info in members:
+                if stop.is_set():
+                    return
+                future = self.executor.submit(extract_member, zip_path, info, self.backend)
+                if not put((info, future)):
+                    future.cancel()
+                    return
+        except Exception as e:
+            logger.error(f"❌ Failed to submit members from {zip_path}: {e}")
+        finally:
+            put(_SENTINEL)
+
+    def iter_extracted(self, zip_path: str, members: List[zipfile.ZipInfo]) -> Iterator[Tuple[zipfile.ZipInfo, Optional[str]]]:
+        """Yields (member, text) in archive order; text is None when extraction failed."""
+        out: queue.Queue = queue.Queue(maxsize=self.max_pending)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._produce, args=(zip_path, members, out, stop), daemon=True)
+        reader.start()
+        try:
+            while True:
+                item = out.get()
+                if item is _SENTINEL:
+                    return
+                info, future = item
+                try:
+                    yield info, future.result()
+                except Exception as e:
+                    logger.error(f"❌ Failed to extract {os.path.basename(info.filename)}: {e}")
+                    yield info, None
+        finally:
+            stop.set()
+            reader.join(timeout=5)
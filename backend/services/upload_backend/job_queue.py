@@ -0,0 +1,92 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, and_, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from db import SessionLocal
+from models import UploadJob
+from utils.logger import logger
+
+# UploadJob is the queue record: queued -> processing -> completed / completed_with_errors / failed
+QUEUED = "queued"
+PROCESSING = "processing"
+
+
+def claim_next_job(db: Session, worker_id: str) -> UploadJob | None:
+    """
+    Claims the oldest queued job, or a processing job whose worker stopped heartbeating.
+    FOR UPDATE SKIP LOCKED lets any number of workers poll the table without blocking
+    each other or claiming the same row.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.ingest_stale_seconds)
+    job = (
+        db.query(UploadJob)
+        .filter(or_(
+            UploadJob.status == QUEUED,
+            and_(UploadJob.status == PROCESSING, UploadJob.heartbeat_at < stale_before),
+        ))
+        .order_by(UploadJob.created_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not job:
+        db.rollback()
+        return None
+
+    if job.status == PROCESSING:
+        logger.warning(f"♻️ Reclaiming stale job {job.id} from {job.worker_id} (resuming at file {job.last_file_index}).")
+
+    job.attempts = (job.attempts or 0) + 1
+    if job.attempts > settings.ingest_max_attempts:
+        job.status = "failed"
+        job.error = f"Gave up after {job.attempts - 1} attempts."
+        db.commit()
+        logger.error(f"❌ Job {job.id} failed: {job.error}")
+        # No one will resume it, so its archive would otherwise sit in upload_dir forever
+        try:
+            if job.zip_path and os.path.exists(job.zip_path):
+                os.unlink(job.zip_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not remove archive of failed job {job.id}: {e}")
+        return None
+
+    job.status = PROCESSING
+    job.worker_id = worker_id
+    job.heartbeat_at = datetime.utcnow()
+    db.commit()
+    return job
+
+
+class JobHeartbeat:
+    """Background thread that keeps heartbeat_at fresh while a job runs, using its own session."""
+
+    def __init__(self, job_id: str, worker_id: str, interval: float):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{job_id[:8]}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with SessionLocal() as db:
+                    db.execute(
+                        update(UploadJob)
+                        .where(UploadJob.id == self.job_id, UploadJob.worker_id == self.worker_id)
+                        .values(heartbeat_at=datetime.utcnow())
+                    )
+                    db.commit()
+            except Exception as e:
+                logger.warning(f"⚠️ Heartbeat for job {self.job_id} failed: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
@@ -0,0 +1,172 @@
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from utils.logger import logger
+
+DEFAULT_BACKOFF = 5.0
+MAX_BACKOFF = 60.0
+RETRY_AFTER_PATTERN = re.compile(r"try again in (?:(\d+)m)?([\d.]+)s", re.IGNORECASE)
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"rate limited (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+def classify_error(error: Exception) -> Optional[RateLimited]:
+    """Maps provider errors that mean 'this key is throttled' to RateLimited."""
+    message = str(error).lower()
+    if "429" in message or "rate limit" in message or "rate_limit" in message:
+        match = RETRY_AFTER_PATTERN.search(message)
+        retry_after = None
+        if match:
+            retry_after = float(match.group(1) or 0) * 60 + float(match.group(2))
+        return RateLimited(retry_after)
+    return None
+
+
+class KeySlot:
+    """One API key, its long-lived chain, and its request budget."""
+
+    def __init__(self, key: str, chain: Any, requests_per_minute: int, concurrency: int):
+        self.key = key
+        self.chain = chain
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.next_slot_at = 0.0
+        self.cooldown_until = 0.0
+        self.consecutive_429s = 0
+        self.disabled = False
+
+    def ready_at(self, now: float) -> float:
+        return max(now, self.next_slot_at, self.cooldown_until)
+
+    def label(self) -> str:
+        return self.key[:10]
+
+
+class ParseScheduler:
+    """
+    Runs resume parses concurrently across every configured API key.
+    Each key gets a request budget (requests_per_minute) and at most `concurrency_per_key`
+    calls in flight. A key that returns 429 is cooled down for the provider's retry-after
+    (or an exponential backoff) and its work is picked up by the other keys. A resume
+    waits on throttled keys for at most `rate_limit_budget` seconds and is then skipped.
+    """
+
+    def __init__(
+        self,
+        api_keys: List[str],
+        chain_factory: Callable[[str], Any],
+        requests_per_minute: int = 30,
+        concurrency_per_key: int = 2,
+        max_attempts: int = 4,
+        rate_limit_budget: float = 300.0,
+    ):
+        self.slots = [
+            KeySlot(key, chain_factory(key), requests_per_minute, concurrency_per_key)
+            for key in dict.fromkeys(k for k in api_keys if k)
+        ]
+        if not self.slots:
+            raise ValueError("ParseScheduler needs at least one API key.")
+        self.max_attempts = max_attempts
+        self.rate_limit_budget = rate_limit_budget
+        self._cond = threading.Condition()
+
+    @property
+    def max_workers(self) -> int:
+        return sum(slot.concurrency for slot in self.slots)
+
+    def _acquire(self, deadline: Optional[float] = None) -> KeySlot:
+        """
+        Waits for a free key. Gives up once `deadline` has passed, or when every key is
+        cooling down past it (by default rate_limit_budget from now), instead of waiting.
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                enabled = [s for s in self.slots if not s.disabled]
+                if not enabled:
+                    raise RuntimeError("All API keys are disabled.")
+                limit = deadline if deadline is not None else now + self.rate_limit_budget
+                if now > limit or min(s.cooldown_until for s in enabled) > limit:
+                    raise RuntimeError("Every API key is rate limited past the retry budget.")
+                candidates = [s for s in enabled if s.in_flight < s.concurrency]
+                if candidates:
+                    slot = min(candidates, key=lambda s: (s.ready_at(now), s.in_flight))
+                    wait = slot.ready_at(now) - now
+                    if wait <= 0:
+                        slot.in_flight += 1
+                        slot.next_slot_at = now + slot.interval
+                        return slot
+                else:
+                    wait = None
+                self._cond.wait(timeout=wait)
+
+    def _release(self, slot: KeySlot, rate_limited: Optional[RateLimited] = None, disable: bool = False):
+        with self._cond:
+            slot.in_flight -= 1
+            if rate_limited:
+                slot.consecutive_429s += 1
+                backoff = rate_limited.retry_after or min(MAX_BACKOFF, DEFAULT_BACKOFF * 2 ** (slot.consecutive_429s - 1))
+                slot.cooldown_until = time.monotonic() + backoff
+                logger.warning(f"⏳ Key {slot.label()} rate limited, cooling down {backoff:.1f}s")
+            else:
+                slot.consecutive_429s = 0
+            if disable:
+                slot.disabled = True
+                logger.error(f"❌ Key {slot.label()} disabled after authentication failure.")
+            self._cond.notify_all()
+
+    def parse(self, text: str) -> dict:
+        """
+        Rate-limited calls are retried once a key cools down and do not count toward
+        max_attempts, so short throttling slows a job down instead of dropping resumes.
+        After rate_limit_budget seconds from the first 429 (e.g. an exhausted daily quota)
+        the resume is given up on, so the job still finishes.
+        """
+        attempts = 0
+        deadline = None
+        while attempts < self.max_attempts:
+            try:
+                slot = self._acquire(deadline)
+            except RuntimeError as e:
+                logger.error(f"❌ {e} Parsing aborted.")
+                return {}
+            try:
+                parsed = slot.chain.invoke({"resume_text": text})
+            except Exception as e:
+                rate_limited = classify_error(e)
+                if rate_limited:
+                    if deadline is None:
+                        deadline = time.monotonic() + self.rate_limit_budget
+                    self._release(slot, rate_limited=rate_limited)
+                    continue
+                if "api key" in str(e).lower() or "401" in str(e):
+                    attempts += 1
+                    self._release(slot, disable=True)
+                    continue
+                self._release(slot)
+                logger.warning(f"⚠️ LLM failure with key {slot.label()}: {e}")
+                return {}
+
+            self._release(slot)
+            if isinstance(parsed, dict) and parsed:
+                return parsed
+            logger.warning(f"⚠️ LLM with key {slot.label()} returned invalid data.")
+            return {}
+
+        logger.error("❌ Parse attempts exhausted. Parsing aborted.")
+        return {}
+
+    def parse_many(self, texts: List[str]) -> List[dict]:
+        """Parses texts concurrently; results keep the input order ({} for failures)."""
+        if not texts:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(texts)), thread_name_prefix="parse") as pool:
+            return list(pool.map(self.parse, texts))
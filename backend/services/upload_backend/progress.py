@@ -0,0 +1,57 @@
+import time
+from datetime import datetime
+from contextlib import contextmanager
+
+from sqlalchemy.orm import Session
+
+from models import UploadJob
+
+
+class JobProgress:
+    """
+    Tracks an UploadJob while it runs. Counters and per-stage timings are kept in
+    memory and written to the job row at most every `commit_every` files or
+    `commit_interval` seconds, so status readers see live progress without a
+    commit per file.
+    """
+
+    def __init__(self, db: Session, job: UploadJob, commit_every: int = 25, commit_interval: float = 2.0):
+        self.db = db
+        self.job = job
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.timings: dict[str, float] = dict(job.stage_timings or {})
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Marks `name` as the current stage and adds its wall time to stage_timings."""
+        if self.job.stage != name:
+            self.job.stage = name
+            self.flush(force=True)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0.0) + time.perf_counter() - start, 3)
+
+    def advance(self, extracted: int = 0, processed: int = 0):
+        self.job.extracted_files = (self.job.extracted_files or 0) + extracted
+        self.job.processed_files = (self.job.processed_files or 0) + processed
+        self._unflushed += extracted + processed
+        self.flush()
+
+    def flush(self, force: bool = False):
+        due = self._unflushed >= self.commit_every or time.monotonic() - self._last_flush >= self.commit_interval
+        if not (force or due):
+            return
+        now = datetime.utcnow()
+        self.job.stage_timings = dict(self.timings)
+        self.job.updated_at = now
+        if self.job.started_at:
+            elapsed = (now - self.job.started_at).total_seconds()
+            self.job.throughput = round((self.job.processed_files or 0) / elapsed, 3) if elapsed > 0 else None
+        self.db.commit()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
@@ -1,14 +1,14 @@
 import os
-import re
 import uuid
 import zipfile
 import tempfile
 import traceback
-import hashlib
 from pathlib import Path
+from datetime import datetime
 import json
 
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from db import SessionLocal
 from config import settings
@@ -17,117 +17,213 @@ from models import UploadJob, Resume
 from langchain.prompts import load_prompt
 from langchain_groq import ChatGroq
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader
 
-from utils.qdrant_client_wrapper import qdrant_client
+from utils.qdrant_client_wrapper import qdrant_client, resume_payload
 from qdrant_client.models import PointStruct
 from utils.logger import logger
-from utils.model_loader import model
+from utils.text_hash import normalize_text
+from utils.model_loader import encode
+from services.upload_backend.llm_pool import ParseScheduler
+from services.upload_backend.extract import ExtractionPool
+from services.upload_backend.progress import JobProgress
+from services.upload_backend.job_queue import JobHeartbeat
 
 # === Constants ===
 PROMPT_FILE = Path(__file__).parent / "prompt.json"
-api_keys = [settings.api1, settings.api2]
 
-# === Embedding & LLM Setup ===
-embedder = model
+# === LLM Setup ===
 prompt = load_prompt(PROMPT_FILE)
 parser = JsonOutputParser()
 qdrant = qdrant_client
 
 def create_llm(api_key: str):
-    return ChatGroq(model="llama-3.3-70b-versatile", api_key=api_key)
-
-# === Helper: SHA256 hash
-def compute_text_hash(text: str) -> str:
-    return hashlib.sha256(text.encode('utf-8')).hexdigest()
-
-# === Resume Parsing ===
-def parse_resume(text: str) -> dict:
-    for key in api_keys:
-        try:
-            llm = create_llm(key)
-            parser_chain = prompt | llm | parser
-            parsed = parser_chain.invoke({"resume_text": text})
-
-            if isinstance(parsed, dict) and parsed:
-                return parsed
-            logger.warning(f"⚠️ LLM with key {key[:10]} returned invalid data.")
-        except Exception as e:
-            logger.warning(f"⚠️ LLM failure with key {key[:10]}: {e}")
-            if any(term in str(e).lower() for term in ["token", "rate limit", "api key"]):
-                continue
-            break
-    logger.error("❌ All API keys failed. Parsing aborted.")
-    return {}
-
-# === Process Single Document ===
-def process_document(db: Session, file_path: str) -> dict | None:
-    filename = os.path.basename(file_path)
+    # Retries are handled by the scheduler so a throttled key can hand work to another key
+    return ChatGroq(model="llama-3.3-70b-versatile", api_key=api_key, max_retries=0)
 
-    try:
-        loader = PyPDFLoader(file_path) if filename.endswith(".pdf") else Docx2txtLoader(file_path)
-        pages = loader.load()
-        full_text = "\n".join(p.page_content for p in pages)
-        full_text = re.sub(r'[\x00-\x1F\x7F]', '', full_text)
+def create_parse_chain(api_key: str):
+    return prompt | create_llm(api_key) | parser
+
+parse_scheduler = ParseScheduler(
+    settings.parse_api_keys,
+    create_parse_chain,
+    requests_per_minute=settings.parse_requests_per_minute,
+    concurrency_per_key=settings.parse_concurrency_per_key,
+    max_attempts=settings.parse_max_attempts,
+    rate_limit_budget=settings.parse_rate_limit_budget,
+)
+
+# === Stage 1: Extract ===
+extraction_pool = ExtractionPool(
+    backend=settings.extract_backend,
+    workers=settings.extract_workers,
+    max_pending=settings.extract_queue_size,
+)
+
+def list_resume_members(zip_ref: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    return [
+        info for info in zip_ref.infolist()
+        if not info.is_dir()
+        and not info.filename.startswith("__MACOSX/")
+        and info.filename.lower().endswith((".pdf", ".docx"))
+    ]
 
-        # Compute hash and check if already in DB
-        doc_hash = str(uuid.uuid5(uuid.NAMESPACE_DNS, full_text))
+# === Stage 2: Dedup ===
+def content_document_id(full_text: str) -> str:
+    """Content hash used as document_id; whitespace-only differences map to the same resume."""
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, normalize_text(full_text)))
 
-        exists = db.query(Resume).filter(Resume.document_id == doc_hash).first()
-        if exists:
-            logger.info(f"⏭️ Skipping {filename} - already exists in DB.")
-            return None
+def find_existing_ids(db: Session, document_ids: list[str]) -> set[str]:
+    """One bulk existence check for every hash in the archive."""
+    if not document_ids:
+        return set()
+    return set(db.execute(select(Resume.document_id).where(Resume.document_id.in_(document_ids))).scalars())
 
-        # Parse via LLM
-        parsed = parse_resume(full_text)
+def extract_unique_documents(
+    zip_path: str,
+    members: list[zipfile.ZipInfo],
+    spill_dir: str,
+    progress: JobProgress | None = None,
+) -> list[tuple[str | None, bool]]:
+    """
+    Pre-pass over the archive: extracts every member, hashes the normalized text and
+    flags in-archive duplicates. Texts are spilled to `spill_dir` so memory stays flat.
+    Returns one (document_id, is_duplicate) entry per member, in archive order;
+    document_id is None when extraction failed.
+    """
+    seen: dict[str, str] = {}
+    entries: list[tuple[str | None, bool]] = []
+    for info, full_text in extraction_pool.iter_extracted(zip_path, members):
+        if progress:
+            progress.advance(extracted=1)
+        if full_text is None:
+            entries.append((None, False))
+            continue
+        doc_hash = content_document_id(full_text)
+        if doc_hash in seen:
+            entries.append((doc_hash, True))
+            logger.info(f"⏭️ Skipping {os.path.basename(info.filename)} - duplicate of {seen[doc_hash]} in archive.")
+            continue
+        seen[doc_hash] = os.path.basename(info.filename)
+        entries.append((doc_hash, False))
+        Path(spill_dir, f"{doc_hash}.txt").write_text(full_text, encoding="utf-8")
+    return entries
+
+# === Stage 3: Parse ===
+def build_record(doc_hash: str, parsed: dict) -> dict:
+    return {
+        "document_id": doc_hash,  # Use content hash as ID
+        "name": parsed.get("name"),
+        "email": parsed.get("email", "NA"),
+        "mobile_number": parsed.get("mobile_number"),
+        "years_experience": parsed.get("years_experience"),
+        "skills": parsed.get("skills") or [],
+        "prev_roles": parsed.get("roles") or [],
+        "location": parsed.get("location"),
+    }
+
+def parse_documents(documents: list[tuple[str, str]]) -> list[dict]:
+    """Parses a stage batch of (document_id, text) concurrently across API keys."""
+    parsed_list = parse_scheduler.parse_many([text for _, text in documents])
+
+    records = []
+    for (doc_hash, _), parsed in zip(documents, parsed_list):
         if not parsed:
-            raise ValueError("LLM parsing returned no data.")
-
-        parsed["document_id"] = doc_hash  # Use content hash as ID
-
-        db_resume = Resume(
-            document_id=doc_hash,
-            name=parsed.get("name"),
-            email=parsed.get("email", "NA"),
-            mobile_number=parsed.get("mobile_number"),
-            years_experience=parsed.get("years_experience"),
-            skills=parsed.get("skills") or [],
-            prev_roles=parsed.get("roles") or [],
-            location=parsed.get("location")
-        )
+            logger.error(f"❌ LLM parsing returned no data for {doc_hash}.")
+            continue
+        records.append(build_record(doc_hash, parsed))
+    return records
 
-        db.merge(db_resume)
-        db.commit()
+# === Stage 4: Embed & Store ===
+def embed_records(records: list[dict]):
+    """One batched encode call for the whole stage batch."""
+    embed_texts = [
+        ["Represent the resume for job relevance retrieval",
+         f"Skills: {', '.join(r['skills'])}\nExperience: {r['years_experience']} years\nRoles: {', '.join(r['prev_roles'])}"]
+        for r in records
+    ]
+    return encode(embed_texts, batch_size=settings.ingest_embed_batch_size)
 
-        embed_text = f"Skills: {', '.join(db_resume.skills)}\nExperience: {db_resume.years_experience} years\nRoles: {', '.join(db_resume.prev_roles)}"
-        vector = embedder.encode([["Represent the resume for job relevance retrieval", embed_text]])[0]
-
-        qdrant.upsert(
-            collection_name=settings.qdrant_collection,
-            points=[PointStruct(
-                id=doc_hash,
-                vector=vector,
-                payload={
-                    "document_id": doc_hash,
-                    "skills": db_resume.skills,
-                    "prev_roles": db_resume.prev_roles,
-                    "experience": db_resume.years_experience,
-                }
-            )]
-        )
+def _insert_partitioned(db: Session, record_by_id: dict):
+    """
+    Insert for a partitioned resumes_llm, which has no unique index on document_id
+    (see utils/partitions.py). Transaction-scoped advisory locks, taken in sorted order,
+    serialize concurrent workers storing the same document_id; once they are held, rows
+    another worker has committed are visible and skipped.
+    """
+    doc_ids = sorted(record_by_id)
+    db.execute(
+        text(
+            "SELECT pg_advisory_xact_lock(hashtext(d)) "
+            "FROM (SELECT d FROM unnest(CAST(:ids AS text[])) AS d ORDER BY d) AS ordered"
+        ),
+        {"ids": doc_ids},
+    )
+    existing = set(db.execute(select(Resume.document_id).where(Resume.document_id.in_(doc_ids))).scalars())
+    rows = [record for doc_id, record in record_by_id.items() if doc_id not in existing]
+    if not rows:
+        return []
+    return db.execute(
+        insert(Resume).values(rows).returning(Resume.document_id, Resume.id, Resume.created_at)
+    ).all()
 
-        logger.info(f"✅ Processed and stored: {filename}")
-        return parsed
+def store_records(db: Session, records: list[dict], vectors, before_commit=None) -> int:
+    """
+    Bulk-inserts the batch into Postgres (ON CONFLICT DO NOTHING, or _insert_partitioned),
+    upserts vectors for the newly inserted rows to Qdrant in chunks, then commits once.
+    `before_commit(inserted_count)` lets the caller put job bookkeeping in the same transaction.
+    """
+    if not records:
+        return 0
 
-    except Exception as e:
+    vector_by_id = {r["document_id"]: v for r, v in zip(records, vectors)}
+    record_by_id = {r["document_id"]: r for r in records}
+
+    try:
+        if settings.storage_partitioned:
+            inserted = _insert_partitioned(db, record_by_id)
+        else:
+            inserted = db.execute(
+                insert(Resume)
+                .values(list(record_by_id.values()))
+                .on_conflict_do_nothing(index_elements=[Resume.document_id])
+                .returning(Resume.document_id, Resume.id, Resume.created_at)
+            ).all()
+        inserted_ids = [doc_id for doc_id, _, _ in inserted]
+
+        points = [
+            PointStruct(
+                id=doc_id,
+                vector=vector_by_id[doc_id].tolist(),
+                payload=resume_payload({**record_by_id[doc_id], "id": resume_id, "created_at": created_at}),
+            )
+            for doc_id, resume_id, created_at in inserted
+        ]
+        for i in range(0, len(points), settings.qdrant_upsert_batch_size):
+            qdrant.upsert(
+                collection_name=settings.qdrant_collection,
+                points=points[i:i + settings.qdrant_upsert_batch_size],
+            )
+
+        if before_commit:
+            before_commit(len(inserted_ids))
+        db.commit()
+    except Exception:
         db.rollback()
-        logger.error(f"❌ Failed to process {filename}: {e}")
-        traceback.print_exc()
-        return None
+        raise
+
+    return len(inserted_ids)
 
 # === Batch Upload Handler ===
+TERMINAL_STATUSES = ("completed", "completed_with_errors", "failed")
+
 def process_zip_file_for_api(zip_path: str, job_id: str):
+    """
+    Runs one upload job. Progress is checkpointed in job.last_file_index together with
+    each stored batch, so a job picked up again after a crash resumes from the last
+    finished file instead of starting over.
+    """
     db = SessionLocal()
+    job = None
     try:
         job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
         if not job:
@@ -135,41 +231,106 @@ def process_zip_file_for_api(zip_path: str, job_id: str):
             return
 
         job.status = "processing"
+        job.started_at = job.started_at or datetime.utcnow()
         db.commit()
+        progress = JobProgress(
+            db, job,
+            commit_every=settings.progress_commit_every,
+            commit_interval=settings.progress_commit_interval,
+        )
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-
-            files = [
-                os.path.join(temp_dir, f)
-                for f in os.listdir(temp_dir)
-                if f.lower().endswith((".pdf", ".docx"))
-            ]
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            members = list_resume_members(zip_ref)
 
-            job.total_files = len(files)
+            job.total_files = len(members)
             if job.total_files == 0:
                 job.status = "failed"
                 db.commit()
                 logger.warning("⚠️ No valid files to process in uploaded ZIP.")
                 return
 
-            processed_count = 0
-            for file_path in files:
-                if process_document(db, file_path):
-                    processed_count += 1
+        cursor = job.last_file_index or 0
+        skipped_base = job.skipped_duplicates or 0
+        if cursor:
+            logger.info(f"⏩ Resuming job {job_id} at file {cursor}/{job.total_files}.")
+        remaining = members[cursor:]
 
-            job.processed_files = processed_count
-            job.status = "completed" if processed_count == job.total_files else "completed_with_errors"
-            db.commit()
+        with tempfile.TemporaryDirectory(prefix="ingest-") as spill_dir:
+            with progress.stage("extract"):
+                entries = extract_unique_documents(zip_path, remaining, spill_dir, progress)
+
+            with progress.stage("dedup"):
+                existing = find_existing_ids(db, [doc_id for doc_id, dup in entries if doc_id and not dup])
+                entries = [(doc_id, dup or doc_id in existing) for doc_id, dup in entries]
+                new_positions = [i for i, (doc_id, dup) in enumerate(entries) if doc_id and not dup]
+            logger.info(
+                f"🔎 Job {job_id}: {len(new_positions)} new resumes, "
+                f"{sum(dup for _, dup in entries)} duplicates ({len(existing)} already stored)."
+            )
 
-            logger.info(f"📦 Upload job {job_id} completed: {processed_count}/{job.total_files} processed.")
+            def checkpoint(end: int):
+                """Marks members[:cursor + end] as finished."""
+                job.last_file_index = cursor + end
+                job.skipped_duplicates = skipped_base + sum(dup for _, dup in entries[:end])
+
+            # Only new resumes reach the LLM
+            batch_size = settings.ingest_batch_size
+            for i in range(0, len(new_positions), batch_size):
+                positions = new_positions[i:i + batch_size]
+                documents = [
+                    (entries[pos][0], Path(spill_dir, f"{entries[pos][0]}.txt").read_text(encoding="utf-8"))
+                    for pos in positions
+                ]
+                try:
+                    with progress.stage("parse"):
+                        records = parse_documents(documents)
+                    with progress.stage("embed"):
+                        vectors = embed_records(records) if records else []
+                    with progress.stage("store"):
+                        def before_commit(inserted: int):
+                            checkpoint(positions[-1] + 1)
+                            progress.advance(processed=inserted)
+                        if records:
+                            store_records(db, records, vectors, before_commit=before_commit)
+                        else:
+                            before_commit(0)
+                            db.commit()
+                except Exception as e:
+                    logger.error(f"❌ Failed to store batch {i // batch_size + 1}: {e}")
+                    traceback.print_exc()
+
+            checkpoint(len(entries))
+
+        job.stage = "done"
+        job.finished_at = datetime.utcnow()
+        progress.flush(force=True)
+        elapsed = (job.finished_at - job.started_at).total_seconds()
+        job.throughput = round(job.processed_files / elapsed, 3) if elapsed > 0 else None
+        job.status = "completed" if job.processed_files + job.skipped_duplicates == job.total_files else "completed_with_errors"
+        db.commit()
+
+        logger.info(
+            f"📦 Upload job {job_id} completed: {job.processed_files}/{job.total_files} processed "
+            f"({job.throughput} resumes/sec, stages: {job.stage_timings})."
+        )
 
     except Exception as e:
         logger.error(f"❌ Fatal error in upload job: {e}")
         traceback.print_exc()
         if job and job.status == "processing":
+            db.rollback()
             job.status = "failed"
+            job.error = str(e)
             db.commit()
     finally:
+        final_status = job.status if job else None
         db.close()
+        # Keep the archive while the job can still be resumed
+        if final_status is None or final_status in TERMINAL_STATUSES:
+            if os.path.exists(zip_path):
+                os.unlink(zip_path)
+
+def run_claimed_job(job_id: str, zip_path: str, worker_id: str):
+    """Processes a job this worker has claimed, heartbeating so it is not reclaimed mid-run."""
+    with JobHeartbeat(job_id, worker_id, settings.ingest_heartbeat_seconds):
+        process_zip_file_for_api(zip_path, job_id)
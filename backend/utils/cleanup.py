@@ -1,34 +1,107 @@
+import time
 from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
+from qdrant_client.models import Filter, FieldCondition, FilterSelector, PointIdsList, Range
+
 from config import settings
 from models import Resume
-from utils.qdrant_client_wrapper import qdrant_client
+from utils.qdrant_client_wrapper import qdrant_client, epoch
 from utils.logger import logger
+from utils.partitions import ensure_partitions, drop_expired_partitions
+from services.rerank_cache import invalidate_documents, purge_stale_scores
+
+def _delete_vectors_by_filter(expiry_threshold: datetime):
+    """One Qdrant call for every point whose payload created_at is before the threshold."""
+    qdrant_client.delete(
+        collection_name=settings.qdrant_collection,
+        points_selector=FilterSelector(filter=Filter(must=[
+            FieldCondition(key="created_at", range=Range(lt=epoch(expiry_threshold))),
+        ])),
+        wait=True,
+    )
+
+def _cleanup_partitions(db: Session) -> dict:
+    """Partitioned storage: expiry is dropping whole day partitions."""
+    ensure_partitions(db.get_bind())
+    report = drop_expired_partitions(db)
+    try:
+        report["purged_scores"] = purge_stale_scores(db)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Failed to purge stale rerank scores: {e}")
+    logger.info(f"✅ Dropped {report['dropped_partitions']} expired partitions ({report['deleted_resumes']} resumes).")
+    return report
 
-def cleanup_expired_resumes(db: Session):
+def cleanup_expired_resumes(db: Session, batch_size: Optional[int] = None) -> dict:
     """
-    Delete resumes older than 24 hours from both PostgreSQL and Qdrant.
+    Delete resumes older than resume_ttl_hours from both PostgreSQL and Qdrant.
+
+    Expired rows are walked in keyset-paginated chunks (id order), so memory stays flat.
+    Per chunk, the vectors go in one bulk Qdrant delete by id and the rows plus their
+    cached rerank scores are deleted and committed together. With cleanup_qdrant_mode
+    "filter", one extra delete on the payload created_at then sweeps expired vectors
+    whose rows are already gone; points without that field are only reached by id.
+    Returns a run report.
     """
-    expiry_threshold = datetime.utcnow() - timedelta(hours=24)
+    if settings.storage_partitioned:
+        return _cleanup_partitions(db)
 
-    expired_resumes = db.query(Resume).filter(Resume.created_at < expiry_threshold).all()
-    if not expired_resumes:
-        logger.info("✅ No expired resumes to clean.")
-        return
+    batch_size = batch_size or settings.cleanup_batch_size
+    started = time.perf_counter()
+    expiry_threshold = datetime.utcnow() - timedelta(hours=settings.resume_ttl_hours)
+    report = {"deleted_resumes": 0, "chunks": 0, "failed_chunks": 0, "invalidated_scores": 0, "purged_scores": 0}
+
+    last_id = 0
+    while True:
+        chunk = db.execute(
+            select(Resume.id, Resume.document_id)
+            .where(Resume.created_at < expiry_threshold, Resume.id > last_id)
+            .order_by(Resume.id)
+            .limit(batch_size)
+        ).all()
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        row_ids = [row.id for row in chunk]
+        document_ids = [row.document_id for row in chunk]
 
-    for resume in expired_resumes:
         try:
             qdrant_client.delete(
                 collection_name=settings.qdrant_collection,
-                points_selector={"points": [resume.document_id]}
+                points_selector=PointIdsList(points=document_ids),
+                wait=True,
             )
+            db.execute(delete(Resume).where(Resume.id.in_(row_ids)))
+            report["invalidated_scores"] += invalidate_documents(db, document_ids)
+            db.commit()
+            report["deleted_resumes"] += len(chunk)
+            report["chunks"] += 1
+        except Exception as e:
+            # Rows stay in place and are retried on the next run
+            db.rollback()
+            report["failed_chunks"] += 1
+            logger.error(f"❌ Failed to clean chunk ending at id {last_id}: {e}")
+
+    if settings.cleanup_qdrant_mode == "filter":
+        try:
+            _delete_vectors_by_filter(expiry_threshold)
         except Exception as e:
-            logger.error(f"❌ Failed to delete vector for {resume.document_id}: {e}")
+            logger.error(f"❌ Filter sweep of expired vectors failed: {e}")
 
     try:
-        db.query(Resume).filter(Resume.created_at < expiry_threshold).delete(synchronize_session=False)
+        report["purged_scores"] = purge_stale_scores(db)
         db.commit()
-        logger.info(f"✅ Cleaned up {len(expired_resumes)} expired resumes.")
     except Exception as e:
         db.rollback()
-        logger.error(f"❌ Failed to delete expired resumes from DB: {e}")
+        logger.error(f"❌ Failed to purge stale rerank scores: {e}")
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    if report["deleted_resumes"]:
+        logger.info(f"✅ Cleaned up {report['deleted_resumes']} expired resumes in {report['chunks']} chunks ({report['seconds']}s).")
+    else:
+        logger.info("✅ No expired resumes to clean.")
+    return report
@@ -0,0 +1,74 @@
+import time
+import threading
+from collections import deque
+
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import Pool
+
+
+class PoolMetrics:
+    """Checkout wait times and timeouts for one connection pool."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def observe(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._recent.append(wait)
+
+    def observe_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool: Pool) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            checkouts, timeouts, total_wait, max_wait = self.checkouts, self.timeouts, self.total_wait, self.max_wait
+
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(p * (len(recent) - 1)))] * 1000, 2) if recent else 0.0
+
+        stats = {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms_avg": round(total_wait / checkouts * 1000, 2) if checkouts else 0.0,
+            "wait_ms_p50": pct(0.50),
+            "wait_ms_p95": pct(0.95),
+            "wait_ms_max": round(max_wait * 1000, 2),
+        }
+        # QueuePool-style pools report their current occupancy
+        for key, attr in (("size", "size"), ("in_use", "checkedout"), ("idle", "checkedin"), ("overflow", "overflow")):
+            if hasattr(pool, attr):
+                stats[key] = getattr(pool, attr)()
+        if "overflow" in stats:
+            stats["overflow"] = max(0, stats["overflow"])  # negative while the base pool is still filling
+        return stats
+
+
+class _TimedCheckout:
+    """Mixin timing how long a checkout waits for a connection (including opening a new one)."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            self.metrics.observe_timeout()
+            raise
+        self.metrics.observe(time.perf_counter() - started)
+        return connection
+
+
+def instrumented_pool(base: type, metrics: PoolMetrics) -> type:
+    """Subclass of pool class `base` reporting into `metrics`; pools recreated on dispose keep it."""
+    return type(f"Instrumented{base.__name__}", (_TimedCheckout, base), {"metrics": metrics})
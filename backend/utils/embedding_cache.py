@@ -0,0 +1,105 @@
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.logger import logger
+from utils.text_hash import normalize_text, text_hash
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU of query vectors keyed by (normalized text, instruction, model name),
+    with an optional SQLite tier on disk that survives restarts. The disk tier is only
+    touched from one dedicated thread, so lookups and writes never block the event loop.
+    """
+
+    def __init__(self, max_size: int = 512, disk_path: Optional[str] = None):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._disk = None
+        self._disk_executor: Optional[ThreadPoolExecutor] = None
+        if disk_path:
+            self._disk_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-cache")
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("CREATE TABLE IF NOT EXISTS query_vectors (key TEXT PRIMARY KEY, vector BLOB)")
+            self._disk.commit()
+            logger.info(f"✅ Query embedding disk cache at {disk_path}")
+
+    @staticmethod
+    def make_key(text: str, instruction: str, model_name: str) -> str:
+        return text_hash(model_name, instruction, normalize_text(text))
+
+    def _get_memory(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return vector
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        placeholders = ", ".join("?" for _ in keys)
+        rows = self._disk.execute(
+            f"SELECT key, vector FROM query_vectors WHERE key IN ({placeholders})", keys
+        ).fetchall()
+        return {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+
+    def _write_disk(self, items: List[Tuple[str, bytes]]) -> None:
+        try:
+            self._disk.executemany("INSERT OR REPLACE INTO query_vectors (key, vector) VALUES (?, ?)", items)
+            self._disk.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Failed to write {len(items)} query vectors to the disk cache: {e}")
+
+    async def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """Cached vectors for keys (None on a miss); the disk tier is read off the event loop, in one query."""
+        vectors = [self._get_memory(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, vector in zip(keys, vectors) if vector is None))
+        found: Dict[str, np.ndarray] = {}
+        if missing and self._disk is not None:
+            loop = asyncio.get_running_loop()
+            found = await loop.run_in_executor(self._disk_executor, self._read_disk, missing)
+        with self._lock:
+            for key, vector in found.items():
+                self._remember(key, vector)
+            self.disk_hits += len(found)
+            self.misses += len(missing) - len(found)
+        return [vector if vector is not None else found.get(key) for key, vector in zip(keys, vectors)]
+
+    def put_many(self, items: List[Tuple[str, np.ndarray]]) -> None:
+        """Stores vectors in memory now; the disk write (one commit) runs in the background."""
+        items = [(key, np.asarray(vector, dtype=np.float32)) for key, vector in items]
+        with self._lock:
+            for key, vector in items:
+                self._remember(key, vector)
+        if self._disk is not None and items:
+            self._disk_executor.submit(self._write_disk, [(key, vector.tobytes()) for key, vector in items])
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "disk_enabled": self._disk is not None,
+            }
@@ -0,0 +1,48 @@
+import json
+import socket
+import threading
+
+import numpy as np
+
+from utils.embedding_protocol import send_frame, recv_frame, decode_vectors
+
+
+class EmbeddingClient:
+    """
+    Client for embedding_server.py over a Unix socket. Each thread keeps its own
+    connection and reconnects once if the server restarted.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _reset(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def encode(self, inputs: list, batch_size: int = 32) -> np.ndarray:
+        request = json.dumps({"inputs": inputs, "batch_size": batch_size}).encode()
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_frame(sock, request)
+                header = recv_frame(sock)
+                body = recv_frame(sock)
+                return decode_vectors(header, body)
+            except (ConnectionError, BrokenPipeError, FileNotFoundError, socket.timeout):
+                self._reset()
+                if attempt:
+                    raise
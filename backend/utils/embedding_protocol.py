@@ -0,0 +1,45 @@
+import json
+import struct
+import socket
+import asyncio
+
+import numpy as np
+
+# Wire format: every frame is a 4-byte big-endian length followed by the body.
+# Request:  one frame, JSON {"inputs": [[instruction, text], ...], "batch_size": int}
+# Response: a JSON header frame {"shape": [n, dim]} or {"error": str}, then a float32 body frame.
+
+_LENGTH = struct.Struct(">I")
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunk = sock.recv(size - len(chunks))
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection.")
+        chunks.extend(chunk)
+    return bytes(chunks)
+
+def send_frame(sock: socket.socket, body: bytes):
+    sock.sendall(_LENGTH.pack(len(body)) + body)
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    return _recv_exact(sock, size)
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    (size,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return await reader.readexactly(size)
+
+def write_frame(writer: asyncio.StreamWriter, body: bytes):
+    writer.write(_LENGTH.pack(len(body)) + body)
+
+def encode_vectors(vectors: np.ndarray) -> tuple[bytes, bytes]:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return json.dumps({"shape": list(vectors.shape)}).encode(), vectors.tobytes()
+
+def decode_vectors(header: bytes, body: bytes) -> np.ndarray:
+    meta = json.loads(header)
+    if "error" in meta:
+        raise RuntimeError(f"Embedding server error: {meta['error']}")
+    return np.frombuffer(body, dtype=np.float32).reshape(meta["shape"])
@@ -0,0 +1,155 @@
+"""
+Encoder backends for the INSTRUCTOR embedding model.
+
+- torch:     the reference InstructorEmbedding / PyTorch model (fp32)
+- onnx:      ONNX Runtime export of the same graph (fp32)
+- onnx-int8: the ONNX export with dynamically quantized int8 weights
+
+All backends take [[instruction, text], ...] and return L2-normalized float32 rows.
+ONNX files are produced once with:
+
+    python -m utils.encoders export --output models/instructor-large-onnx
+"""
+import os
+import argparse
+from typing import List
+
+import numpy as np
+
+from utils.logger import logger
+
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model-int8.onnx"
+
+
+class TorchInstructorEncoder:
+    def __init__(self, model_name: str):
+        from InstructorEmbedding import INSTRUCTOR
+
+        self.model = INSTRUCTOR(model_name)
+
+    def encode(self, inputs: List[list], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(inputs, batch_size=batch_size)
+
+
+class OnnxInstructorEncoder:
+    """
+    Runs the exported graph with ONNX Runtime. Tokenization mirrors INSTRUCTOR.tokenize:
+    the model sees instruction + text, and the instruction tokens are excluded from
+    mean pooling via `context_masks`.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, threads: int = 0, max_seq_length: int = 512):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        path = os.path.join(model_dir, ONNX_INT8_FILE if quantized else ONNX_FP32_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found. Run `python -m utils.encoders export --output {model_dir}` first.")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = max_seq_length
+
+    def _features(self, batch: List[list]) -> dict:
+        instructions = [instruction for instruction, _ in batch]
+        texts = [(instruction + text.strip()).strip() for instruction, text in batch]
+        tokens = self.tokenizer(texts, padding=True, truncation="longest_first",
+                                max_length=self.max_seq_length, return_tensors="np")
+        context = self.tokenizer([i.strip() for i in instructions], padding=True, truncation="longest_first",
+                                 max_length=self.max_seq_length, return_tensors="np")
+        context_masks = context["attention_mask"].sum(axis=1) - 1
+        context_masks[context_masks <= 1] = 0
+        return {
+            "input_ids": tokens["input_ids"].astype(np.int64),
+            "attention_mask": tokens["attention_mask"].astype(np.int64),
+            "context_masks": context_masks.astype(np.int64),
+        }
+
+    def encode(self, inputs: List[list], batch_size: int = 32) -> np.ndarray:
+        # Length-sorted batches keep padding low, as INSTRUCTOR.encode does
+        if not inputs:
+            return np.empty((0, 0), dtype=np.float32)
+        order = np.argsort([-len(text) for _, text in inputs])
+        rows = []
+        for start in range(0, len(inputs), batch_size):
+            batch = [inputs[i] for i in order[start:start + batch_size]]
+            rows.append(self.session.run(None, self._features(batch))[0])
+        result = np.empty((len(inputs), rows[0].shape[1]), dtype=np.float32)
+        result[order] = np.vstack(rows)
+        return result
+
+
+def create_encoder(backend: str, model_name: str, onnx_dir: str, threads: int = 0):
+    if backend == "torch":
+        return TorchInstructorEncoder(model_name)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxInstructorEncoder(onnx_dir, quantized=backend == "onnx-int8", threads=threads)
+    raise ValueError(f"Unknown encoder backend '{backend}', expected one of {ENCODER_BACKENDS}")
+
+
+# === Export ===
+def export_onnx(model_name: str, output_dir: str, quantize: bool = True):
+    """Exports INSTRUCTOR (transformer + masked mean pooling + dense + normalize) to ONNX."""
+    import torch
+    from InstructorEmbedding import INSTRUCTOR
+
+    model = INSTRUCTOR(model_name, device="cpu").eval()
+    transformer = model[0].auto_model
+    head = torch.nn.Sequential(*[model[i] for i in range(2, len(model))])
+
+    class ExportWrapper(torch.nn.Module):
+        def forward(self, input_ids, attention_mask, context_masks):
+            token_embeddings = transformer(input_ids=input_ids, attention_mask=attention_mask)[0]
+            positions = torch.arange(input_ids.shape[1]).unsqueeze(0)
+            pool_mask = (attention_mask * (positions >= context_masks.unsqueeze(1))).unsqueeze(-1).float()
+            pooled = (token_embeddings * pool_mask).sum(1) / pool_mask.sum(1).clamp(min=1e-9)
+            return head({"sentence_embedding": pooled})["sentence_embedding"]
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, ONNX_FP32_FILE)
+    sample = model.tokenize([["Represent the resume for job relevance retrieval", "Skills: Python"]])
+    torch.onnx.export(
+        ExportWrapper(),
+        (sample["input_ids"], sample["attention_mask"], sample["context_masks"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask", "context_masks"],
+        output_names=["sentence_embedding"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "context_masks": {0: "batch"},
+            "sentence_embedding": {0: "batch"},
+        },
+        opset_version=17,
+    )
+    model.tokenizer.save_pretrained(output_dir)
+    logger.info(f"✅ Exported fp32 ONNX model to {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        int8_path = os.path.join(output_dir, ONNX_INT8_FILE)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        logger.info(f"✅ Wrote int8-quantized ONNX model to {int8_path}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="INSTRUCTOR encoder backends")
+    sub = ap.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="export ONNX fp32 and int8 models")
+    export.add_argument("--model", default="hkunlp/instructor-large")
+    export.add_argument("--output", default="models/instructor-large-onnx")
+    export.add_argument("--no-quantize", action="store_true")
+    args = ap.parse_args()
+
+    if args.command == "export":
+        export_onnx(args.model, args.output, quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
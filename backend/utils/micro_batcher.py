@@ -0,0 +1,112 @@
+import time
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent encode requests into shared forward passes.
+
+    The first waiting request opens a batch; the batch is sent once `window_ms` has
+    passed or `max_batch` rows are queued, whichever comes first. Each caller gets
+    back exactly the rows for its own inputs. Up to `max_in_flight` batches run on
+    the executor at once.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[list], np.ndarray],
+        executor: Optional[Executor] = None,
+        max_batch: int = 32,
+        window_ms: float = 5.0,
+        max_in_flight: int = 1,
+    ):
+        self.encode_fn = encode_fn
+        self.executor = executor
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000
+        self.max_in_flight = max(1, max_in_flight)
+        self.batches = 0
+        self.items = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._collector is None or self._collector.done():
+            # (Re)bind to the current loop, e.g. after asyncio.run() in a script
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._collector = loop.create_task(self._collect())
+
+    async def encode(self, inputs: list) -> np.ndarray:
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((inputs, future))
+        return await future
+
+    async def _collect(self):
+        # One get() task lives across windows: cancelling a get() on timeout (as
+        # wait_for does) can drop an item that arrived at the same moment on 3.11.
+        getter: Optional[asyncio.Task] = None
+        while True:
+            if getter is None:
+                getter = self._loop.create_task(self._queue.get())
+            pending = [await getter]
+            getter = None
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    getter = self._loop.create_task(self._queue.get())
+                    done, _ = await asyncio.wait({getter}, timeout=remaining)
+                    if not done:
+                        break  # still waiting; it opens the next batch
+                    item = getter.result()
+                    getter = None
+                pending.append(item)
+                size += len(item[0])
+
+            await self._slots.acquire()
+            self._loop.create_task(self._run_batch(pending))
+
+    async def _run_batch(self, pending: List[tuple]):
+        try:
+            merged = [row for inputs, _ in pending for row in inputs]
+            try:
+                vectors = await self._loop.run_in_executor(self.executor, self.encode_fn, merged)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self.batches += 1
+            self.items += len(merged)
+            offset = 0
+            for inputs, future in pending:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(inputs)])
+                offset += len(inputs)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+        }
@@ -1,3 +1,64 @@
-from InstructorEmbedding import INSTRUCTOR
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-model = INSTRUCTOR("hkunlp/instructor-large")
+from config import settings
+from utils.logger import logger
+from utils.micro_batcher import MicroBatcher
+
+MODEL_NAME = "hkunlp/instructor-large"
+# Vectors differ slightly between backends (int8 most of all), so cached ones are keyed by both
+ENCODER_ID = f"{MODEL_NAME}:{settings.encoder_backend}"
+
+_model = None
+_model_lock = threading.Lock()
+_client = None
+
+def get_model():
+    """Loads the configured encoder backend on first use, so processes that never embed never pay for it."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from utils.encoders import create_encoder
+
+                logger.info(f"⏳ Loading embedding model {MODEL_NAME} ({settings.encoder_backend})...")
+                _model = create_encoder(
+                    settings.encoder_backend,
+                    MODEL_NAME,
+                    settings.encoder_onnx_dir,
+                    threads=settings.encoder_threads,
+                )
+                logger.info(f"✅ Embedding model {MODEL_NAME} ({settings.encoder_backend}) loaded.")
+    return _model
+
+def _embedding_client():
+    global _client
+    if _client is None:
+        from utils.embedding_client import EmbeddingClient
+
+        _client = EmbeddingClient(settings.embedding_server_socket)
+    return _client
+
+def encode(inputs: list, batch_size: int = 32):
+    """
+    Embeds [[instruction, text], ...]. Goes to the shared embedding server when
+    embedding_server_socket is set, otherwise to this process's own model.
+    """
+    if settings.embedding_server_socket:
+        return _embedding_client().encode(inputs, batch_size=batch_size)
+    return get_model().encode(inputs, batch_size=batch_size)
+
+# Dedicated pool for model inference so encode() never runs on the event loop
+inference_executor = ThreadPoolExecutor(
+    max_workers=settings.inference_workers,
+    thread_name_prefix="inference",
+)
+
+# Concurrent query embeddings (one per /search) share forward passes
+query_batcher = MicroBatcher(
+    encode,
+    inference_executor,
+    max_batch=settings.embed_max_batch,
+    window_ms=settings.embed_batch_window_ms,
+    max_in_flight=settings.inference_workers,
+)
@@ -0,0 +1,147 @@
+"""
+Optional time-partitioned storage (storage_partitioned=true).
+
+resumes_llm becomes a table RANGE-partitioned by created_at with one partition per
+UTC day, and every Qdrant point carries its day (YYYYMMDD) in the `day` payload
+field. Expiry then drops whole day partitions and deletes the matching points with
+one filter, instead of deleting rows one by one and leaving the table to vacuum.
+
+A day partition is dropped once all of it is older than resume_ttl_hours, so rows
+live up to one day longer than the TTL; search only queries live days.
+"""
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from qdrant_client.models import Filter, FieldCondition, FilterSelector, MatchValue
+
+from config import settings
+from models import Resume
+from utils.qdrant_client_wrapper import qdrant_client, day_key
+from utils.logger import logger
+
+TABLE = Resume.__tablename__
+
+# Same columns and index names as the Resume model. Postgres requires unique
+# constraints on a partitioned table to include the partition key, so the primary
+# key is (id, created_at) and document_id is indexed but not unique; store_records
+# serializes inserts per document_id with advisory locks instead.
+PARTITIONED_DDL = [
+    f"""
+    CREATE TABLE {TABLE} (
+        id SERIAL,
+        document_id VARCHAR NOT NULL,
+        name VARCHAR,
+        email VARCHAR,
+        mobile_number VARCHAR,
+        years_experience FLOAT,
+        skills TEXT[],
+        prev_roles TEXT[],
+        location TEXT,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at)
+    """,
+    f"CREATE INDEX ix_{TABLE}_id ON {TABLE} (id)",
+    f"CREATE INDEX ix_{TABLE}_document_id ON {TABLE} (document_id)",
+    f"CREATE INDEX ix_{TABLE}_created_at ON {TABLE} (created_at)",
+]
+
+
+def partition_name(day: date) -> str:
+    return f"{TABLE}_p{day:%Y%m%d}"
+
+
+def live_since() -> date:
+    """First day that still holds unexpired resumes."""
+    return (datetime.utcnow() - timedelta(hours=settings.resume_ttl_hours)).date()
+
+
+def is_partitioned(conn) -> bool:
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :name)"
+    ), {"name": TABLE}).scalar())
+
+
+def create_partitioned_table(engine: Engine):
+    """
+    Creates resumes_llm as a partitioned table. Must run before create_all(), which
+    would otherwise create the plain table. An existing plain table is left alone.
+    """
+    with engine.begin() as conn:
+        if inspect(conn).has_table(TABLE):
+            if not is_partitioned(conn):
+                logger.warning(f"⚠️ {TABLE} exists and is not partitioned; storage_partitioned needs it recreated.")
+            return
+        for statement in PARTITIONED_DDL:
+            conn.execute(text(statement))
+        logger.info(f"🛠️ Created partitioned table {TABLE}.")
+
+
+def ensure_partitions(engine: Engine, days_ahead: Optional[int] = None):
+    """Creates day partitions from today through `days_ahead` days from now."""
+    days_ahead = settings.partition_days_ahead if days_ahead is None else days_ahead
+    today = datetime.utcnow().date()
+    with engine.begin() as conn:
+        for offset in range(days_ahead + 1):
+            day = today + timedelta(days=offset)
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+            ))
+
+
+def list_partition_days(db: Session) -> List[date]:
+    names = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent"
+    ), {"parent": TABLE}).scalars().all()
+    prefix = f"{TABLE}_p"
+    return sorted(datetime.strptime(n[len(prefix):], "%Y%m%d").date() for n in names if n.startswith(prefix))
+
+
+def drop_expired_partitions(db: Session) -> dict:
+    """
+    Drops every day partition entirely older than the TTL, after deleting that day's
+    vectors from Qdrant and its cached rerank scores. Returns a run report.
+    """
+    started = time.perf_counter()
+    report = {"deleted_resumes": 0, "dropped_partitions": 0, "failed_partitions": 0, "invalidated_scores": 0}
+    cutoff = datetime.utcnow() - timedelta(hours=settings.resume_ttl_hours)
+
+    for day in list_partition_days(db):
+        if datetime.combine(day + timedelta(days=1), datetime.min.time()) > cutoff:
+            continue
+        name = partition_name(day)
+        try:
+            rows = db.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+            qdrant_client.delete(
+                collection_name=settings.qdrant_collection,
+                points_selector=FilterSelector(filter=Filter(must=[
+                    FieldCondition(key="day", match=MatchValue(value=day_key(day))),
+                ])),
+                wait=True,
+            )
+            # Rows stored twice before inserts were serialized may still be live in a later partition
+            report["invalidated_scores"] += db.execute(text(
+                f"DELETE FROM rerank_scores WHERE document_id IN (SELECT document_id FROM {name}) "
+                f"AND document_id NOT IN (SELECT document_id FROM {TABLE} WHERE created_at >= :day_end)"
+            ), {"day_end": day + timedelta(days=1)}).rowcount
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+            report["deleted_resumes"] += rows
+            report["dropped_partitions"] += 1
+            logger.info(f"🗑️ Dropped partition {name} ({rows} resumes).")
+        except Exception as e:
+            db.rollback()
+            report["failed_partitions"] += 1
+            logger.error(f"❌ Failed to drop partition {name}: {e}")
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
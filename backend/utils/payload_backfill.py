@@ -0,0 +1,62 @@
+"""
+Rewrites the Qdrant payload of every stored resume from its Postgres row, so points
+ingested before a payload field existed (e.g. `location`, or the display profile
+stored with profiles_in_payload) pick it up.
+
+    python -m utils.payload_backfill
+"""
+from qdrant_client.models import SetPayload, SetPayloadOperation
+
+from config import settings
+from db import SessionLocal
+from models import Resume
+from utils.logger import logger
+from utils.qdrant_client_wrapper import qdrant_client, resume_payload
+
+BATCH_SIZE = 500
+
+
+def backfill_payloads(batch_size: int = BATCH_SIZE) -> int:
+    updated = 0
+    last_id = 0
+    with SessionLocal() as db:
+        while True:
+            rows = (
+                db.query(Resume)
+                .filter(Resume.id > last_id)
+                .order_by(Resume.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            qdrant_client.batch_update_points(
+                collection_name=settings.qdrant_collection,
+                update_operations=[
+                    SetPayloadOperation(set_payload=SetPayload(
+                        payload=resume_payload({
+                            "id": r.id,
+                            "document_id": r.document_id,
+                            "name": r.name,
+                            "email": r.email,
+                            "mobile_number": r.mobile_number,
+                            "skills": r.skills,
+                            "prev_roles": r.prev_roles,
+                            "years_experience": r.years_experience,
+                            "location": r.location,
+                            "created_at": r.created_at,
+                        }),
+                        points=[r.document_id],
+                    ))
+                    for r in rows
+                ],
+            )
+            updated += len(rows)
+            last_id = rows[-1].id
+    return updated
+
+
+if __name__ == "__main__":
+    count = backfill_payloads()
+    logger.info(f"✅ Backfilled Qdrant payloads for {count} resumes.")
@@ -1,6 +1,9 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance
+from datetime import datetime, timezone
+from typing import Optional
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import VectorParams, Distance, PayloadSchemaType, TextIndexParams, TokenizerType
 from config import settings
+from schemas import clean_email
 from utils.logger import logger
 
 # === Initialize Qdrant Client ===
@@ -10,22 +13,114 @@ qdrant_client = QdrantClient(
     # api_key=settings.qdrant_api_key,  # Uncomment when using cloud
 )
 
+# Async client for request handlers running on the event loop
+async_qdrant_client = AsyncQdrantClient(
+    url=settings.qdrant_host,
+    timeout=30.0,
+)
+
+# === Payload ===
+# Indexed payload fields used by search filters. Text indexes make skill and location
+# matches case-insensitive and token-based ("kubernetes" matches "Kubernetes (EKS)").
+TEXT_INDEX = TextIndexParams(type="text", tokenizer=TokenizerType.WORD, lowercase=True)
+PAYLOAD_INDEXES = {
+    "skills": TEXT_INDEX,
+    "location": TEXT_INDEX,
+    "experience": PayloadSchemaType.FLOAT,
+    "created_at": PayloadSchemaType.FLOAT,  # epoch seconds (UTC); lets cleanup delete by filter
+    "day": PayloadSchemaType.INTEGER,       # YYYYMMDD (UTC); the day partition (utils/partitions.py)
+}
+# Job description collection: matching-jobs lookups only consider open roles
+JOB_PAYLOAD_INDEXES = {
+    "is_open": PayloadSchemaType.BOOL,
+}
+
+def day_key(value) -> int:
+    """YYYYMMDD for a date or naive UTC datetime."""
+    return int(value.strftime("%Y%m%d"))
+
+def epoch(value: datetime) -> float:
+    """Epoch seconds for the naive UTC datetimes stored in Postgres."""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+def resume_payload(record: dict) -> dict:
+    """
+    Qdrant payload for a resume record (same keys as the Resume columns). With
+    profiles_in_payload the display fields are stored too, so /search can skip Postgres.
+    """
+    payload = {
+        "document_id": record["document_id"],
+        "skills": record.get("skills") or [],
+        "prev_roles": record.get("prev_roles") or [],
+        "experience": record.get("years_experience"),
+        "location": record.get("location"),
+    }
+    if record.get("created_at") is not None:
+        payload["created_at"] = epoch(record["created_at"])
+        payload["day"] = day_key(record["created_at"])
+    if settings.profiles_in_payload and record.get("id") is not None:
+        payload.update({
+            "resume_id": record["id"],
+            "name": record.get("name"),
+            "email": clean_email(record.get("email")),
+            "mobile_number": record.get("mobile_number"),
+        })
+    return payload
+
+def profile_from_payload(payload: dict) -> Optional[dict]:
+    """ResumeOut fields from a payload written with profiles_in_payload, else None."""
+    if not payload or payload.get("resume_id") is None:
+        return None
+    return {
+        "id": payload["resume_id"],
+        "document_id": payload["document_id"],
+        "name": payload.get("name"),
+        "email": payload.get("email"),
+        "mobile_number": payload.get("mobile_number"),
+        "years_experience": payload.get("experience"),
+        "skills": payload.get("skills") or [],
+        "prev_roles": payload.get("prev_roles") or [],
+        "location": payload.get("location"),
+    }
+
+def ensure_payload_indexes(collection: Optional[str] = None, indexes: Optional[dict] = None):
+    """Creates any missing payload indexes; existing collections get them on the next startup."""
+    collection = collection or settings.qdrant_collection
+    indexes = PAYLOAD_INDEXES if indexes is None else indexes
+    existing = qdrant_client.get_collection(collection).payload_schema or {}
+    for field, schema in indexes.items():
+        if field in existing:
+            continue
+        qdrant_client.create_payload_index(
+            collection_name=collection,
+            field_name=field,
+            field_schema=schema,
+        )
+        logger.info(f"✅ Created Qdrant payload index on '{collection}.{field}'.")
+
+def _ensure_collection(collection: str, indexes: dict):
+    if not qdrant_client.collection_exists(collection):
+        qdrant_client.create_collection(
+            collection_name=collection,
+            vectors_config=VectorParams(
+                size=settings.embedding_dim,
+                distance=Distance.COSINE,
+            )
+        )
+        logger.info(f"✅ Qdrant collection '{collection}' created.")
+    else:
+        logger.info(f"✅ Qdrant collection '{collection}' already exists.")
+    ensure_payload_indexes(collection, indexes)
+
 def setup_qdrant_collection():
     """
-    Creates the Qdrant collection if it doesn't exist.
+    Creates the resume and job description collections if they don't exist, plus
+    their payload indexes. Both hold vectors from the same encoder, so a resume's
+    vector can be used directly as a query against the job descriptions.
     """
     try:
-        if not qdrant_client.collection_exists(settings.qdrant_collection):
-            qdrant_client.create_collection(
-                collection_name=settings.qdrant_collection,
-                vectors_config=VectorParams(
-                    size=settings.embedding_dim,
-                    distance=Distance.COSINE,
-                )
-            )
-            logger.info(f"✅ Qdrant collection '{settings.qdrant_collection}' created.")
-        else:
-            logger.info(f"✅ Qdrant collection '{settings.qdrant_collection}' already exists.")
+        _ensure_collection(settings.qdrant_collection, PAYLOAD_INDEXES)
+        _ensure_collection(settings.qdrant_jobs_collection, JOB_PAYLOAD_INDEXES)
     except Exception as e:
         logger.error(f"❌ Failed to set up Qdrant collection: {e}")
         raise
@@ -0,0 +1,37 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from db import Base
+from utils.logger import logger
+
+def add_missing_columns(engine: Engine):
+    """
+    create_all() never alters existing tables, so columns added to models later
+    are appended here as nullable columns. Existing data is left untouched.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS "{column.name}" {column_type}'))
+                logger.info(f"🛠️ Added column {table.name}.{column.name} ({column_type})")
+
+def add_missing_indexes(engine: Engine):
+    """Creates indexes declared on models after their table already existed."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                index.create(conn, checkfirst=True)
+                logger.info(f"🛠️ Created index {index.name} on {table.name}")
@@ -0,0 +1,113 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+from sqlalchemy import event, inspect
+
+from config import settings
+from models import User
+from schemas import UserOut
+
+# === Password hashing ===
+# bcrypt is deliberately slow (~250 ms at cost 12), so it runs on a small dedicated
+# pool: a login burst queues there instead of blocking the event loop.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.bcrypt_workers,
+    thread_name_prefix="bcrypt",
+)
+
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=settings.bcrypt_rounds)).decode()
+
+def verify_password(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+def needs_rehash(hashed: str) -> bool:
+    """True when a stored hash was made with a different cost than bcrypt_rounds ("$2b$12$...")."""
+    try:
+        return int(hashed.split("$")[2]) != settings.bcrypt_rounds
+    except (IndexError, ValueError):
+        return False
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, verify_password, password, hashed)
+
+
+# === Token -> user cache ===
+class TokenUserCache:
+    """
+    Bounded LRU of token -> UserOut, so protected routes skip the JWT decode and the
+    users lookup. Entries live auth_cache_ttl_seconds (never past the token's own
+    expiry) and are dropped as soon as the user row is updated or deleted.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[UserOut]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, user: UserOut, token_exp: Optional[float] = None) -> None:
+        if self.ttl <= 0:
+            return
+        expires = time.monotonic() + self.ttl
+        if token_exp is not None:
+            expires = min(expires, time.monotonic() + token_exp - time.time())
+        with self._lock:
+            self._entries[token] = (expires, user.email, user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_email(self, email: Optional[str]) -> None:
+        with self._lock:
+            for token in [t for t, entry in self._entries.items() if entry[1] == email]:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+user_cache = TokenUserCache(ttl=settings.auth_cache_ttl_seconds, max_size=settings.auth_cache_size)
+
+# ORM updates and deletes of a user (from any session in this process) drop its cached
+# tokens. Bulk query.update()/delete() bypass mapper events and other processes keep
+# their own caches, so those rely on the TTL.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    # Tokens carry the email, so a changed email also drops the old one's entries
+    for email in [target.email, *(inspect(target).attrs.email.history.deleted or [])]:
+        user_cache.invalidate_email(email)
+
+@event.listens_for(User.email, "set", active_history=True)
+def _keep_previous_email(target, value, oldvalue, initiator):
+    """Registered for active_history: loads the old email on change so the flush sees it."""
@@ -0,0 +1,12 @@
+import re
+import hashlib
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace runs and trims, so formatting-only edits hash the same."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+def text_hash(*parts: str) -> str:
+    """SHA256 over the given parts, separated so ("ab", "c") and ("a", "bc") differ."""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
@@ -2,6 +2,8 @@ import { useEffect, useState } from "react";
 import axios from "axios";
 import { FileText, Upload as UploadIcon, ArrowRight, Server, DatabaseZap, Loader2, AlertTriangle, CheckCircle2, AlertCircle } from "lucide-react";
 
+const STATUS_POLL_INTERVAL_MS = 2000;
+
 export default function Upload({ onTabChange }) {
     const [file, setFile] = useState(null);
     const [status, setStatus] = useState("");
@@ -46,6 +48,58 @@ export default function Upload({ onTabChange }) {
         }
     };
 
+    // Applies one job status update; returns true once the job has reached a terminal status
+    const applyJobStatus = ({ processed, total: totalFiles, status: jobStatus, stage, throughput, eta_seconds }) => {
+        setProcessed(processed);
+        setTotal(totalFiles);
+
+        // 3. CHECK JOB COMPLETION STATUS FROM BACKEND
+        // The backend sets the final status to 'completed', 'completed_with_errors', or 'failed'
+        if (jobStatus === 'completed' || jobStatus === 'completed_with_errors' || jobStatus === 'failed') {
+            setDone(true);
+
+            if (jobStatus === 'completed') {
+                setStatus("✅ Processing complete! All new resumes were added.");
+                setStatusType("success");
+            } else if (jobStatus === 'completed_with_errors') {
+                setStatus("⚠️ Finished. Some resumes were skipped (duplicates or errors).");
+                setStatusType("warning");
+            } else {
+                setStatus("❌ A critical error occurred during processing.");
+                setStatusType("error");
+            }
+            return true;
+        }
+        if (stage) {
+            const rate = throughput ? ` · ${throughput} resumes/sec` : "";
+            const eta = eta_seconds != null ? ` · ~${Math.ceil(eta_seconds)}s left` : "";
+            setStatus(`Processing (${stage})${rate}${eta}`);
+        }
+        return false;
+    };
+
+    const showStatusError = (message) => {
+        setStatus(message);
+        setStatusType("error");
+    };
+
+    // Fallback when the live stream cannot be kept open: poll until the job finishes
+    const pollJobStatus = async (jobId) => {
+        while (true) {
+            await new Promise((resolve) => setTimeout(resolve, STATUS_POLL_INTERVAL_MS));
+            try {
+                const res = await axios.get(`http://localhost:8000/upload-status/${jobId}`);
+                if (applyJobStatus(res.data)) return;
+            } catch (err) {
+                if (err.response?.status === 404) {
+                    showStatusError("❌ The upload job no longer exists.");
+                    return;
+                }
+                console.error("Status poll failed, retrying:", err);
+            }
+        }
+    };
+
     const handleUpload = async () => {
         if (!file) {
             setStatus("Please select a ZIP file first.");
@@ -71,39 +125,30 @@ export default function Upload({ onTabChange }) {
             setStatus("Processing... This may take a moment.");
             setStatusType("processing");
 
-            // 2. POLL FOR REAL-TIME STATUS
-            const interval = setInterval(async () => {
-                try {
-                    const progressRes = await axios.get(`http://localhost:8000/upload-status/${jobId}`);
-                    const { processed_files, total_files, status: jobStatus } = progressRes.data;
-
-                    setProcessed(processed_files);
-                    setTotal(total_files);
-
-                    // 3. CHECK JOB COMPLETION STATUS FROM BACKEND
-                    // The backend sets the final status to 'completed', 'completed_with_errors', or 'failed'
-                    if (jobStatus !== 'processing') {
-                        clearInterval(interval);
-                        setDone(true);
-
-                        if (jobStatus === 'completed') {
-                            setStatus("✅ Processing complete! All new resumes were added.");
-                            setStatusType("success");
-                        } else if (jobStatus === 'completed_with_errors') {
-                            setStatus("⚠️ Finished. Some resumes were skipped (duplicates or errors).");
-                            setStatusType("warning");
-                        } else if (jobStatus === 'failed') {
-                            setStatus("❌ A critical error occurred during processing.");
-                            setStatusType("error");
-                        }
-                    }
-                } catch (err) {
-                    clearInterval(interval);
-                    setStatus("❌ Could not get processing status. Check server logs.");
-                    setStatusType("error");
-                    console.error("Polling failed:", err);
+            // 2. SUBSCRIBE TO LIVE STATUS (Server-Sent Events)
+            const source = new EventSource(`http://localhost:8000/upload-status/${jobId}/stream`);
+            let finished = false;
+            source.onmessage = (event) => {
+                if (applyJobStatus(JSON.parse(event.data))) {
+                    finished = true;
+                    source.close();
+                }
+            };
+            source.onerror = (err) => {
+                if (finished) return;
+                if (err.data) {
+                    // "error" event sent by the server: the job no longer exists
+                    source.close();
+                    showStatusError("❌ The upload job no longer exists.");
+                    return;
+                }
+                // While readyState is CONNECTING the browser reconnects by itself (network blip,
+                // proxy idle timeout). Once it gives up (CLOSED), keep following the job by polling.
+                if (source.readyState === EventSource.CLOSED) {
+                    console.warn("Status stream closed, falling back to polling:", err);
+                    pollJobStatus(jobId);
                 }
-            }, 2000); // Poll every 2 seconds
+            };
         } catch (err) {
             setStatus("❌ Upload failed. The server may be down or the file is invalid.");
             setStatusType("error");
@@ -126,7 +171,7 @@ export default function Upload({ onTabChange }) {
             setResumeCount(res.data.resume_count);
         } catch (err) {
             console.error("Failed to clear resumes", err);
-            alert("Failed to clear resumes.");
+            alert(err.response?.data?.detail || "Failed to clear resumes.");
         }
     };
 